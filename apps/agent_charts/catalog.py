@@ -0,0 +1,561 @@
+"""
+Chart catalog module for the Agent Charts application.
+Provides a process-wide catalog of chart listings and favorites that is shared by all sessions.
+"""
+
+import streamlit as st
+import pandas as pd
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from snowflake.snowpark import Session
+from snowflake.snowpark import functions as F
+
+from session_manager import get_session_manager
+from search_index import ChartSearchIndex
+from config import DATABASE_CONFIG, CATALOG_CONFIG
+
+
+class FavoritesIndex:
+    """
+    Index of favorites answering count and membership lookups in constant time.
+    
+    Keeps a favorite count per chart and a set of favorite charts per user.
+    A ranking of all favorited charts ordered by favorite count, then creation
+    timestamp (newest first) is maintained on every change, so the top charts
+    can be read without sorting.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._user_favorites: Dict[str, Set[str]] = {}
+        self._creation_times: Dict[str, int] = {}
+        self._ranking: List[Tuple[int, int, str]] = []
+    
+    def rebuild(self, favorites: pd.DataFrame) -> bool:
+        """
+        Replace the index content with the given favorites.
+        
+        Args:
+            favorites: DataFrame with CHART_UUID and USER_NAME columns
+        
+        Returns:
+            bool: True if the favorite count of any chart changed
+        """
+        counts = {}
+        user_favorites = {}
+        for chart_uuid, user_name in zip(favorites['CHART_UUID'], favorites['USER_NAME']):
+            chart_uuids = user_favorites.setdefault(user_name, set())
+            if chart_uuid not in chart_uuids:
+                chart_uuids.add(chart_uuid)
+                counts[chart_uuid] = counts.get(chart_uuid, 0) + 1
+        
+        with self._lock:
+            counts_changed = counts != self._counts
+            self._counts = counts
+            self._user_favorites = user_favorites
+            self._ranking = sorted(self._rank_key(chart_uuid) for chart_uuid in counts)
+            return counts_changed
+    
+    def add(self, chart_uuid: str, user_name: str) -> bool:
+        """
+        Add a favorite.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            user_name: Name of the user
+        
+        Returns:
+            bool: False if the user had already favorited the chart
+        """
+        with self._lock:
+            chart_uuids = self._user_favorites.setdefault(user_name, set())
+            if chart_uuid in chart_uuids:
+                return False
+            chart_uuids.add(chart_uuid)
+            self._set_count(chart_uuid, self._counts.get(chart_uuid, 0) + 1)
+            return True
+    
+    def remove(self, chart_uuid: str, user_name: str) -> bool:
+        """
+        Remove a favorite.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            user_name: Name of the user
+        
+        Returns:
+            bool: False if the user had not favorited the chart
+        """
+        with self._lock:
+            chart_uuids = self._user_favorites.get(user_name, set())
+            if chart_uuid not in chart_uuids:
+                return False
+            chart_uuids.discard(chart_uuid)
+            self._set_count(chart_uuid, self._counts[chart_uuid] - 1)
+            return True
+    
+    def count(self, chart_uuid: str) -> int:
+        """Get the number of favorites of a chart."""
+        return self._counts.get(chart_uuid, 0)
+    
+    def is_favorited(self, chart_uuid: str, user_name: str) -> bool:
+        """Check if a chart is favorited by a user."""
+        return chart_uuid in self._user_favorites.get(user_name, ())
+    
+    def user_favorites(self, user_name: str) -> Set[str]:
+        """Get the UUIDs of all charts favorited by a user."""
+        return set(self._user_favorites.get(user_name, ()))
+    
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[str, int]]:
+        """
+        Get the most favorited charts.
+        
+        Args:
+            limit: Maximum number of charts to return
+            offset: Number of charts to skip
+        
+        Returns:
+            List of (chart_uuid, favorite_count) ordered by favorite count
+        """
+        with self._lock:
+            ranked = self._ranking[offset:offset + limit]
+        return [(chart_uuid, -negative_count) for negative_count, _, chart_uuid in ranked]
+    
+    def set_creation_times(self, charts: pd.DataFrame):
+        """
+        Set the creation timestamps used to order charts with equal favorite counts.
+        
+        Args:
+            charts: DataFrame with CHART_UUID and CREATION_TIMESTAMP columns
+        """
+        creation_times = pd.to_datetime(charts['CREATION_TIMESTAMP']).astype('int64')
+        with self._lock:
+            for chart_uuid, creation_time in zip(charts['CHART_UUID'], creation_times):
+                if chart_uuid in self._counts:
+                    self._ranking.pop(bisect_left(self._ranking, self._rank_key(chart_uuid)))
+                    self._creation_times[chart_uuid] = int(creation_time)
+                    insort(self._ranking, self._rank_key(chart_uuid))
+                else:
+                    self._creation_times[chart_uuid] = int(creation_time)
+    
+    def _rank_key(self, chart_uuid: str) -> Tuple[int, int, str]:
+        """Get the ranking key of a chart. Must be called while holding the lock."""
+        return (-self._counts[chart_uuid], -self._creation_times.get(chart_uuid, 0), chart_uuid)
+    
+    def _set_count(self, chart_uuid: str, count: int):
+        """Update the count and ranking of a chart. Must be called while holding the lock."""
+        if chart_uuid in self._counts:
+            self._ranking.pop(bisect_left(self._ranking, self._rank_key(chart_uuid)))
+        if count > 0:
+            self._counts[chart_uuid] = count
+            insort(self._ranking, self._rank_key(chart_uuid))
+        else:
+            self._counts.pop(chart_uuid, None)
+
+
+class ChartCatalog:
+    """
+    Read-mostly catalog of chart listings and favorites.
+    
+    The catalog holds only the listing columns of all charts, ordered from
+    newest to oldest, and is refreshed on a timer. After the initial load,
+    refreshes read only the rows changed since the previous refresh using the
+    CHANGES clause of the change-tracked chart, favorites and (optional) snapshot tables.
+    Without change tracking, refreshes fall back to loading the charts created
+    since the last watermark, and favorites are reloaded completely at an
+    interval that backs off up to max_full_reload_interval_seconds.
+    
+    Favorite changes that are not written to Snowflake yet are applied again
+    after every complete reload of the favorites, so they stay visible.
+    
+    The time of the last change of the chart listings or favorite counts is
+    tracked, so readers of tables derived from the charts can tell whether the
+    catalog is newer than those tables.
+    
+    The data frames are replaced as a whole and never modified in place, so
+    readers don't need to lock.
+    """
+    
+    def __init__(self, session: Session, refresh_interval_seconds: int, watermark_lookback_seconds: int,
+                 max_full_reload_interval_seconds: int):
+        self.session = session
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.watermark_lookback_seconds = watermark_lookback_seconds
+        self.max_full_reload_interval_seconds = max_full_reload_interval_seconds
+        self._lock = threading.Lock()
+        self._charts = pd.DataFrame(columns=DATABASE_CONFIG["chart_list_columns"])
+        self._favorites = FavoritesIndex()
+        self._search_index = ChartSearchIndex()
+        self._watermark = None
+        self._changes_since = None
+        self._refreshed_at = None
+        self._changed_at = None
+        self._change_listeners = set()
+        self._pending_favorites = None
+        self._changes_available = True
+        self._full_reload_interval = refresh_interval_seconds
+        self._next_full_reload = None
+    
+    @property
+    def charts(self) -> pd.DataFrame:
+        """Chart listings ordered by CREATION_TIMESTAMP and CHART_UUID, newest first."""
+        self.ensure_fresh()
+        return self._charts
+    
+    @property
+    def favorites(self) -> FavoritesIndex:
+        """Index of all favorites."""
+        self.ensure_fresh()
+        return self._favorites
+    
+    @property
+    def search_index(self) -> ChartSearchIndex:
+        """Local search index over the questions and semantic views of all charts."""
+        self.ensure_fresh()
+        return self._search_index
+    
+    def ensure_fresh(self):
+        """Refresh the catalog if the refresh interval has passed."""
+        if self._is_stale():
+            self.refresh(force=False)
+    
+    def add_change_listener(self, listener: Callable[[List[str], List[str]], None]):
+        """
+        Register a function that is called when charts change during a refresh.
+        
+        The listener receives the UUIDs of the changed charts and the SQL
+        queries of their previous versions. Registering the same function
+        again has no effect.
+        
+        Args:
+            listener: Function called with (chart_uuids, sql_queries)
+        """
+        self._change_listeners.add(listener)
+    
+    def changed_within(self, seconds: float) -> bool:
+        """
+        Check whether the chart listings or favorite counts changed recently.
+        
+        Args:
+            seconds: Length of the period before now
+        
+        Returns:
+            bool: True if the catalog changed within the period
+        """
+        return self._changed_at is not None and time.monotonic() - self._changed_at <= seconds
+    
+    def set_pending_favorites(self, pending_favorites: Callable[[], Dict[Tuple[str, str], bool]]):
+        """
+        Set the function returning favorite changes that are not written yet.
+        
+        Args:
+            pending_favorites: Function returning {(chart_uuid, user_name): is_favorite}
+        """
+        self._pending_favorites = pending_favorites
+    
+    def refresh(self, force: bool = True):
+        """
+        Apply all changes made to the charts and favorites since the last refresh.
+        
+        Args:
+            force: Refresh even if the refresh interval has not passed yet
+        """
+        with self._lock:
+            # Another session may have refreshed while waiting for the lock
+            if not force and not self._is_stale():
+                return
+            
+            try:
+                if self._changes_since is None:
+                    self._load_all()
+                elif self._changes_available or time.monotonic() >= self._next_full_reload:
+                    try:
+                        self._apply_changes()
+                        self._changes_available = True
+                        self._full_reload_interval = self.refresh_interval_seconds
+                    except Exception:
+                        # Change tracking is disabled or the changes are outside the retention period,
+                        # the CHANGES clause is only tried again with the next full reload
+                        self._append_new_charts()
+                        self._reload_favorites()
+                        self._changes_available = False
+                        self._next_full_reload = time.monotonic() + self._full_reload_interval
+                        self._full_reload_interval = min(self._full_reload_interval * 2,
+                                                         self.max_full_reload_interval_seconds)
+                else:
+                    self._append_new_charts()
+            except Exception as e:
+                st.error(f"Failed to refresh chart catalog: {str(e)}")
+            finally:
+                self._refreshed_at = time.monotonic()
+    
+    def get_chart_page(self, cursor: Optional[Tuple] = None, limit: int = 20,
+                       user_name: Optional[str] = None,
+                       chart_uuids: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Optional[Tuple]]:
+        """
+        Get a page of charts ordered from newest to oldest.
+        
+        Args:
+            cursor: (CREATION_TIMESTAMP, CHART_UUID) of the last chart of the previous page
+            limit: Maximum number of charts to return
+            user_name: Only return charts created by this user
+            chart_uuids: Only return charts with these UUIDs
+        
+        Returns:
+            Tuple of (charts, next_cursor); next_cursor is None on the last page
+        """
+        charts = self.charts
+        
+        if user_name is not None:
+            charts = charts[charts['USER_NAME'] == user_name]
+        
+        if chart_uuids is not None:
+            charts = charts[charts['CHART_UUID'].isin(chart_uuids)]
+        
+        if cursor is not None:
+            cursor_timestamp, cursor_uuid = cursor
+            charts = charts[
+                (charts['CREATION_TIMESTAMP'] < cursor_timestamp) |
+                ((charts['CREATION_TIMESTAMP'] == cursor_timestamp) &
+                 (charts['CHART_UUID'] < cursor_uuid))
+            ]
+        
+        if len(charts) <= limit:
+            return charts, None
+        
+        page_df = charts.head(limit)
+        last_chart = page_df.iloc[-1]
+        return page_df, (last_chart['CREATION_TIMESTAMP'], last_chart['CHART_UUID'])
+    
+    def get_charts_by_uuids(self, chart_uuids: List[str]) -> pd.DataFrame:
+        """
+        Get chart listings for specific UUIDs, ordered by the provided UUID list.
+        
+        Args:
+            chart_uuids: List of chart UUIDs (order preserved)
+        
+        Returns:
+            DataFrame: Chart listings of the UUIDs found in the catalog
+        """
+        charts = self.charts.set_index('CHART_UUID', drop=False)
+        found_uuids = [chart_uuid for chart_uuid in dict.fromkeys(chart_uuids) if chart_uuid in charts.index]
+        return charts.loc[found_uuids].reset_index(drop=True)
+    
+    def add_favorite(self, chart_uuid: str, user_name: str):
+        """
+        Add a favorite for all sessions.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            user_name: Name of the user
+        """
+        if self._favorites.add(chart_uuid, user_name):
+            self._mark_changed()
+    
+    def remove_favorite(self, chart_uuid: str, user_name: str):
+        """
+        Remove a favorite for all sessions.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            user_name: Name of the user
+        """
+        if self._favorites.remove(chart_uuid, user_name):
+            self._mark_changed()
+    
+    def _is_stale(self) -> bool:
+        """Check whether the refresh interval has passed since the last refresh."""
+        return (self._refreshed_at is None or
+                time.monotonic() - self._refreshed_at > self.refresh_interval_seconds)
+    
+    def _mark_changed(self):
+        """Record that the chart listings or favorite counts changed."""
+        self._changed_at = time.monotonic()
+    
+    def _load_all(self):
+        """Load all charts and favorites and start tracking changes from now on."""
+        changes_since = self._current_timestamp()
+        self._charts = self._sort_charts(self._load_charts(None))
+        self._favorites.set_creation_times(self._charts)
+        self._favorites.rebuild(self._load_favorites())
+        self._apply_pending_favorites()
+        self._search_index.rebuild(self._search_documents(self._charts))
+        self._watermark = self._charts['CREATION_TIMESTAMP'].max() if not self._charts.empty else None
+        self._changes_since = changes_since
+    
+    def _reload_favorites(self):
+        """Load all favorites and track favorite changes from now on."""
+        changes_since = self._current_timestamp()
+        if self._favorites.rebuild(self._load_favorites()):
+            self._mark_changed()
+        self._apply_pending_favorites()
+        self._changes_since = changes_since
+    
+    def _apply_pending_favorites(self):
+        """Apply favorite changes that are not written yet to the favorites index."""
+        if self._pending_favorites is None:
+            return
+        for (chart_uuid, user_name), is_favorite in self._pending_favorites().items():
+            if is_favorite:
+                self._favorites.add(chart_uuid, user_name)
+            else:
+                self._favorites.remove(chart_uuid, user_name)
+    
+    def _apply_changes(self):
+        """Merge the rows changed since the last refresh into the catalog."""
+        changes_until = self._current_timestamp()
+        list_columns = DATABASE_CONFIG["chart_list_columns"]
+        
+        chart_changes = self._load_changes(
+            DATABASE_CONFIG["chart_table"], list_columns + ['SQL_QUERY'], changes_until
+        )
+        favorite_changes = self._load_changes(
+            DATABASE_CONFIG["favorites_table"], ['CHART_UUID', 'USER_NAME'], changes_until
+        )
+        snapshot_changes = self._load_snapshot_changes(changes_until)
+        
+        # Snapshot changes only invalidate cached results, the chart listings stay the same
+        changed_uuids = set(chart_changes['CHART_UUID']) | set(snapshot_changes['CHART_UUID'])
+        
+        if not chart_changes.empty:
+            # Updates are reported as a delete of the old and an insert of the new row
+            inserted_charts = chart_changes[chart_changes['CHANGE_ACTION'] == 'INSERT'][list_columns]
+            remaining_charts = self._charts[~self._charts['CHART_UUID'].isin(chart_changes['CHART_UUID'])]
+            self._charts = self._sort_charts(pd.concat([inserted_charts, remaining_charts], ignore_index=True))
+            self._favorites.set_creation_times(inserted_charts)
+            deleted_uuids = chart_changes[chart_changes['CHANGE_ACTION'] == 'DELETE']['CHART_UUID']
+            for chart_uuid in deleted_uuids:
+                self._search_index.remove(chart_uuid)
+            for chart_uuid, text in self._search_documents(inserted_charts):
+                self._search_index.add(chart_uuid, text)
+            newest_timestamp = inserted_charts['CREATION_TIMESTAMP'].max()
+            if pd.notna(newest_timestamp) and (self._watermark is None or newest_timestamp > self._watermark):
+                self._watermark = newest_timestamp
+        
+        # Apply deletes before inserts so that re-added favorites are kept
+        for change_action in ['DELETE', 'INSERT']:
+            changes = favorite_changes[favorite_changes['CHANGE_ACTION'] == change_action]
+            update_index = self._favorites.remove if change_action == 'DELETE' else self._favorites.add
+            for chart_uuid, user_name in zip(changes['CHART_UUID'], changes['USER_NAME']):
+                update_index(chart_uuid, user_name)
+        self._apply_pending_favorites()
+        
+        if not chart_changes.empty or not favorite_changes.empty:
+            self._mark_changed()
+        
+        self._changes_since = changes_until
+        
+        if changed_uuids:
+            deleted_charts = chart_changes[chart_changes['CHANGE_ACTION'] == 'DELETE']
+            self._notify_change_listeners(list(changed_uuids), deleted_charts['SQL_QUERY'].tolist())
+    
+    def _load_snapshot_changes(self, changes_until: str) -> pd.DataFrame:
+        """
+        Load the snapshot changes since the last refresh.
+        
+        The snapshot table is optional, so if it is missing or not change
+        tracked, there are no snapshot changes.
+        """
+        try:
+            return self._load_changes(DATABASE_CONFIG["snapshot_table"], ['CHART_UUID'], changes_until)
+        except Exception:
+            return pd.DataFrame(columns=['CHART_UUID', 'CHANGE_ACTION'])
+    
+    def _append_new_charts(self):
+        """Add charts created since the last watermark to the catalog."""
+        new_charts = self._load_charts(self._watermark)
+        # The lookback window loads charts again that are already in the catalog
+        if not new_charts['CHART_UUID'].isin(self._charts['CHART_UUID']).all():
+            charts = (pd.concat([new_charts, self._charts], ignore_index=True)
+                     .drop_duplicates('CHART_UUID', keep='first'))
+            self._charts = self._sort_charts(charts)
+            self._favorites.set_creation_times(new_charts)
+            for chart_uuid, text in self._search_documents(new_charts):
+                self._search_index.add(chart_uuid, text)
+            self._watermark = self._charts['CREATION_TIMESTAMP'].max()
+            self._mark_changed()
+    
+    def _notify_change_listeners(self, chart_uuids: List[str], sql_queries: List[str]):
+        """Call all change listeners, ignoring their errors."""
+        for listener in list(self._change_listeners):
+            try:
+                listener(chart_uuids, sql_queries)
+            except Exception:
+                pass
+    
+    def _current_timestamp(self) -> str:
+        """Get the current Snowflake timestamp as text with full precision."""
+        return self.session.sql(
+            "SELECT TO_VARCHAR(CURRENT_TIMESTAMP(), 'YYYY-MM-DD HH24:MI:SS.FF9 TZHTZM')"
+        ).collect()[0][0]
+    
+    def _load_changes(self, table_name: str, columns: List[str], changes_until: str) -> pd.DataFrame:
+        """
+        Load the net row changes of a change-tracked table since the last refresh.
+        
+        Returns:
+            DataFrame: The requested columns plus CHANGE_ACTION ('INSERT' or 'DELETE')
+        """
+        timestamp_format = 'YYYY-MM-DD HH24:MI:SS.FF9 TZHTZM'
+        return self.session.sql(f"""
+            SELECT {', '.join(columns)}, METADATA$ACTION AS CHANGE_ACTION
+            FROM {table_name}
+              CHANGES(INFORMATION => DEFAULT)
+              AT(TIMESTAMP => TO_TIMESTAMP_LTZ('{self._changes_since}', '{timestamp_format}'))
+              END(TIMESTAMP => TO_TIMESTAMP_LTZ('{changes_until}', '{timestamp_format}'))
+        """).to_pandas()
+    
+    @staticmethod
+    def _sort_charts(charts: pd.DataFrame) -> pd.DataFrame:
+        """Order charts from newest to oldest."""
+        return (charts
+               .sort_values(['CREATION_TIMESTAMP', 'CHART_UUID'], ascending=False)
+               .reset_index(drop=True))
+    
+    @staticmethod
+    def _search_documents(charts: pd.DataFrame) -> List[Tuple[str, str]]:
+        """Get the (CHART_UUID, text) pairs indexed for local search."""
+        texts = charts['QUESTION'].fillna('') + ' ' + charts['SEMANTIC_VIEW_NAME'].fillna('')
+        return list(zip(charts['CHART_UUID'], texts))
+    
+    def _load_charts(self, watermark: Optional[pd.Timestamp]) -> pd.DataFrame:
+        """
+        Load chart listings created at or after the watermark.
+        
+        A lookback window before the watermark catches charts whose insert
+        committed after newer charts were already loaded.
+        """
+        charts = (self.session.table(DATABASE_CONFIG["chart_table"])
+                 .select(DATABASE_CONFIG["chart_list_columns"]))
+        
+        if watermark is not None:
+            since = watermark - pd.Timedelta(seconds=self.watermark_lookback_seconds)
+            charts = charts.filter(F.col('CREATION_TIMESTAMP') >= F.lit(since.to_pydatetime()))
+        
+        return charts.to_pandas()
+    
+    def _load_favorites(self) -> pd.DataFrame:
+        """Load all distinct favorites."""
+        return (self.session.table(DATABASE_CONFIG["favorites_table"])
+               .select('CHART_UUID', 'USER_NAME')
+               .distinct()
+               .to_pandas())
+
+
+@st.cache_resource
+def get_chart_catalog() -> ChartCatalog:
+    """
+    Get the chart catalog shared by all sessions of this process.
+    
+    Returns:
+        ChartCatalog: The shared chart catalog
+    """
+    return ChartCatalog(
+        session=get_session_manager().session,
+        refresh_interval_seconds=CATALOG_CONFIG["refresh_interval_seconds"],
+        watermark_lookback_seconds=CATALOG_CONFIG["watermark_lookback_seconds"],
+        max_full_reload_interval_seconds=CATALOG_CONFIG["max_full_reload_interval_seconds"]
+    )
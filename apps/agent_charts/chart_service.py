@@ -5,15 +5,16 @@ Handles chart visualization, rendering, and display logic.
 
 import streamlit as st
 import pandas as pd
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 from data_service import ChartDataService
 from ui_components import (
     display_chart_metadata, display_question_card, create_action_buttons,
     display_expandable_section, display_two_column_layout, show_info_message,
-    show_success_message, show_error_message
+    show_success_message, show_error_message, show_loading_spinner,
+    create_pagination_buttons
 )
-from config import UI_CONFIG
+from config import DATABASE_CONFIG, SEARCH_CONFIG, UI_CONFIG
 
 
 class ChartVisualizationService:
@@ -22,14 +23,24 @@ class ChartVisualizationService:
     def __init__(self):
         self.data_service = ChartDataService()
     
-    def render_chart_tile(self, chart_data: pd.Series, page: str, counter: int = 0):
+    @st.fragment
+    def render_chart_tile(self, chart_data: pd.Series, page: str, counter: int = 0,
+                          query_data: Optional[pd.DataFrame] = None, query_error: Optional[str] = None,
+                          thumbnails: bool = False, thumbnail: Optional[Union[str, Dict]] = None):
         """
         Render a single chart tile with visualization and metadata.
         
+        Each tile is a fragment, so its favorite button and interactive toggle
+        rerun only this tile instead of the whole page.
+        
         Args:
             chart_data: Chart data row from DataFrame
             page: Current page identifier
             counter: Chart counter for layout purposes
+            query_data: Prefetched query results for this chart
+            query_error: Error raised while prefetching the query results
+            thumbnails: Show a static preview until the interactive chart is requested
+            thumbnail: Cached preview of this chart (skips loading its data)
         """
         chart_uuid = chart_data['CHART_UUID']
         chart_spec = chart_data['CHART_SPEC']
@@ -37,19 +48,38 @@ class ChartVisualizationService:
         user_name = chart_data['USER_NAME']
         semantic_view = chart_data['SEMANTIC_VIEW_NAME']
         timestamp = chart_data['CREATION_TIMESTAMP']
-        
-        # Prepare chart specification with data
-        chart_spec_dict, chart_query_data = self.data_service.prepare_chart_specification(
-            chart_spec, sql_query
-        )
-        
-        if not chart_spec_dict:
-            show_error_message("Failed to load chart specification")
-            return
+        interactive_key = f"{page}_{chart_uuid}_interactive"
+        interactive = not thumbnails or st.session_state.get(interactive_key, False)
+        
+        # Prepare chart preview or chart specification with data
+        chart_spec_dict = {}
+        if query_error is None:
+            if interactive:
+                chart_spec_dict, chart_query_data = self.data_service.prepare_chart_specification(
+                    chart_spec, sql_query, query_data, chart_uuid=chart_uuid
+                )
+            elif thumbnail is None:
+                thumbnail = self.data_service.prepare_chart_thumbnail(
+                    chart_spec, sql_query, chart_uuid, query_data
+                )
+            
+            if not chart_spec_dict and thumbnail is None:
+                show_error_message("Failed to load chart specification")
+                return
         
         with st.container(border=True):
             # Main chart visualization
-            st.vega_lite_chart(spec=chart_spec_dict, use_container_width=True)
+            if query_error is not None:
+                show_error_message(f"Failed to load chart data: {query_error}")
+            elif chart_spec_dict:
+                st.vega_lite_chart(spec=chart_spec_dict, use_container_width=True)
+            elif isinstance(thumbnail, str):
+                st.image(thumbnail, use_container_width=True)
+            else:
+                st.vega_lite_chart(spec=thumbnail, use_container_width=True)
+            
+            if thumbnails:
+                st.toggle("Interactive chart", key=interactive_key)
             
             # Chart metadata
             favorite_count = self.data_service.get_favorite_count(chart_uuid)
@@ -71,30 +101,117 @@ class ChartVisualizationService:
                 if success:
                     action = "removed from" if is_favorite else "added to"
                     show_success_message(f"Chart {action} favorites!")
-                    st.rerun()
+                    st.rerun(scope="fragment")
     
-    def render_chart_grid(self, charts_df: pd.DataFrame, page: str = "default"):
+    def render_chart_grid(self, charts_df: pd.DataFrame, page: str = "default",
+                          thumbnails: Optional[bool] = None):
         """
         Render charts in a two-column grid layout.
         
+        In thumbnail mode, tiles show cached static previews and only load
+        their data when no preview is cached yet or the interactive chart
+        is switched on.
+        
         Args:
             charts_df: DataFrame containing chart data
             page: Page identifier for button keys
+            thumbnails: Show previews instead of interactive charts (default: UI_CONFIG["thumbnail_mode"])
         """
+        if thumbnails is None:
+            thumbnails = UI_CONFIG["thumbnail_mode"]
+        
         if charts_df.empty:
             show_info_message("No charts found.")
             return
         
+        # Load specifications and queries for the visible charts only
+        if 'CHART_SPEC' not in charts_df.columns:
+            chart_details = self.data_service.get_chart_details(charts_df['CHART_UUID'].tolist())
+            if chart_details.empty:
+                show_error_message("Failed to load chart specifications")
+                return
+            charts_df = charts_df.merge(chart_details, on='CHART_UUID', how='inner')
+        
         # Create list of chart data for two-column layout
         chart_items = [charts_df.iloc[i] for i in range(len(charts_df))]
         
+        # Tiles with a cached preview need no data unless their interactive chart is shown
+        cached_thumbnails = {}
+        if thumbnails:
+            for chart in chart_items:
+                if st.session_state.get(f"{page}_{chart['CHART_UUID']}_interactive", False):
+                    continue
+                thumbnail = self.data_service.get_cached_thumbnail(chart['CHART_UUID'], chart['CHART_SPEC'])
+                if thumbnail is not None:
+                    cached_thumbnails[chart['CHART_UUID']] = thumbnail
+        uncached_charts_df = charts_df[~charts_df['CHART_UUID'].isin(cached_thumbnails.keys())]
+        
+        # Load stored snapshots and run the remaining chart queries concurrently
+        with show_loading_spinner("Loading chart data..."):
+            snapshots = self.data_service.get_chart_snapshots(tuple(uncached_charts_df['CHART_UUID']))
+            live_charts_df = uncached_charts_df[~uncached_charts_df['CHART_UUID'].isin(snapshots.keys())]
+            query_results, query_errors = self.data_service.prefetch_chart_data(
+                tuple(live_charts_df['SQL_QUERY'])
+            )
+        
         # Render function for each chart
         def render_chart(chart_data, counter):
-            self.render_chart_tile(chart_data, page, counter)
+            chart_uuid = chart_data['CHART_UUID']
+            sql_query = chart_data['SQL_QUERY']
+            if chart_uuid in snapshots:
+                query_data, query_error = snapshots[chart_uuid], None
+            else:
+                query_data, query_error = query_results.get(sql_query), query_errors.get(sql_query)
+            self.render_chart_tile(
+                chart_data, page, counter,
+                query_data=query_data,
+                query_error=query_error,
+                thumbnails=thumbnails,
+                thumbnail=cached_thumbnails.get(chart_uuid)
+            )
         
         # Display in two-column layout
         display_two_column_layout(chart_items, render_chart)
     
+    def render_paginated_chart_grid(self, page: str,
+                                    load_page: Callable[[Optional[object]], Tuple[pd.DataFrame, Optional[object]]],
+                                    empty_message: str = "No charts found."):
+        """
+        Render one page of charts with navigation to the previous and next page.
+        
+        The cursors of all visited pages are kept in the session state, so only
+        the currently visible page of charts is loaded.
+        
+        Args:
+            page: Page identifier for button and session state keys
+            load_page: Function returning (charts, next_cursor) for a cursor
+            empty_message: Message to display if there are no charts at all
+        """
+        cursors_key = f"{page}_page_cursors"
+        if cursors_key not in st.session_state:
+            st.session_state[cursors_key] = [None]
+        cursors = st.session_state[cursors_key]
+        
+        charts_df, next_cursor = load_page(cursors[-1])
+        
+        if charts_df.empty and len(cursors) == 1:
+            show_info_message(empty_message)
+            return
+        
+        self.render_chart_grid(charts_df, page)
+        
+        previous_clicked, next_clicked = create_pagination_buttons(
+            page, has_previous=len(cursors) > 1, has_next=next_cursor is not None
+        )
+        
+        if previous_clicked:
+            cursors.pop()
+            st.rerun()
+        
+        if next_clicked:
+            cursors.append(next_cursor)
+            st.rerun()
+    
     def render_chart_details(self, chart_uuid: str):
         """
         Render detailed view of a specific chart.
@@ -103,8 +220,10 @@ class ChartVisualizationService:
             chart_uuid: UUID of the chart to display
         """
         # Get chart data
-        charts_df = st.session_state.get('charts', pd.DataFrame())
-        chart_data = charts_df[charts_df['CHART_UUID'] == chart_uuid]
+        chart_data = self.data_service.get_charts_by_uuids(
+            [chart_uuid],
+            columns=DATABASE_CONFIG["chart_list_columns"] + DATABASE_CONFIG["chart_detail_columns"]
+        )
         
         if chart_data.empty:
             show_error_message("Chart not found!")
@@ -118,17 +237,23 @@ class ChartVisualizationService:
         timestamp = chart['CREATION_TIMESTAMP']
         question = chart['QUESTION']
         
+        # Main chart visualization
+        st.markdown("### 📊 Chart Visualization")
+        refresh_clicked = st.button(
+            "🔄 Refresh data",
+            key=f"details_{chart_uuid}_refresh_data",
+            type="secondary"
+        )
+        
         # Prepare chart for visualization
         chart_spec_dict, chart_query_data = self.data_service.prepare_chart_specification(
-            chart_spec, sql_query
+            chart_spec, sql_query, chart_uuid=chart_uuid, refresh=refresh_clicked
         )
         
         if not chart_spec_dict:
             show_error_message("Failed to load chart specification")
             return
         
-        # Main chart visualization
-        st.markdown("### 📊 Chart Visualization")
         st.vega_lite_chart(spec=chart_spec_dict, use_container_width=True)
         
         # Chart metadata
@@ -169,11 +294,10 @@ class ChartVisualizationService:
         Args:
             limit: Maximum number of charts to display
         """
-        charts_df = st.session_state.get('charts', pd.DataFrame())
-        chart_limit = limit or UI_CONFIG["charts_per_page"]
-        recent_charts = charts_df.head(chart_limit)
-        
-        self.render_chart_grid(recent_charts, "most_recent")
+        self.render_paginated_chart_grid(
+            "most_recent",
+            lambda cursor: self.data_service.get_chart_page(cursor, limit)
+        )
     
     def render_most_favorited_charts(self, limit: int = None):
         """
@@ -182,13 +306,11 @@ class ChartVisualizationService:
         Args:
             limit: Maximum number of charts to display
         """
-        most_favorited = self.data_service.get_most_favorited_charts(limit)
-        
-        if most_favorited.empty:
-            show_info_message("No charts have been favorited yet.")
-            return
-        
-        self.render_chart_grid(most_favorited, "most_favorites")
+        self.render_paginated_chart_grid(
+            "most_favorites",
+            lambda offset: self.data_service.get_most_favorited_charts(limit, offset or 0),
+            "No charts have been favorited yet."
+        )
     
     def render_user_charts(self, user_name: str, limit: int = None):
         """
@@ -198,16 +320,11 @@ class ChartVisualizationService:
             user_name: Name of the user
             limit: Maximum number of charts to display
         """
-        user_charts_df = st.session_state.get('my_charts', pd.DataFrame())
-        
-        if user_charts_df.empty:
-            show_info_message("You haven't created any charts yet.")
-            return
-        
-        chart_limit = limit or UI_CONFIG["charts_per_page"]
-        limited_charts = user_charts_df.head(chart_limit)
-        
-        self.render_chart_grid(limited_charts, "my_charts")
+        self.render_paginated_chart_grid(
+            "my_charts",
+            lambda cursor: self.data_service.get_chart_page(cursor, limit, user_name=user_name),
+            "You haven't created any charts yet."
+        )
     
     def render_user_favorite_charts(self, user_name: str):
         """
@@ -216,16 +333,12 @@ class ChartVisualizationService:
         Args:
             user_name: Name of the user
         """
-        favorite_charts = self.data_service.get_user_favorite_charts(user_name)
-        
-        if favorite_charts.empty:
-            show_info_message(
-                "You haven't added any charts to your favorites yet. "
-                "Browse charts and click '⭐ Add to Favorite' to see them here!"
-            )
-            return
-        
-        self.render_chart_grid(favorite_charts, "favorite_charts")
+        self.render_paginated_chart_grid(
+            "favorite_charts",
+            lambda cursor: self.data_service.get_user_favorite_charts(user_name, cursor),
+            "You haven't added any charts to your favorites yet. "
+            "Browse charts and click '⭐ Add to Favorite' to see them here!"
+        )
     
     def render_search_results(self, search_query: str):
         """
@@ -236,20 +349,24 @@ class ChartVisualizationService:
         """
         if not search_query.strip():
             # Show all charts if no search query
-            charts_df = st.session_state.get('charts', pd.DataFrame())
-            self.render_chart_grid(charts_df, "search")
+            self.render_paginated_chart_grid(
+                "search",
+                lambda cursor: self.data_service.get_chart_page(cursor)
+            )
+            return
+        
+        min_query_length = SEARCH_CONFIG["min_query_length"]
+        if len(search_query.strip()) < min_query_length:
+            show_info_message(f"Enter at least {min_query_length} characters to search")
             return
         
         # Perform search
-        search_results = self.data_service.search_charts(search_query)
+        chart_uuids = self.data_service.search_charts(search_query)
         
-        if not search_results:
+        if not chart_uuids:
             show_info_message(f"No charts found for '{search_query}'")
             return
         
-        # Extract chart UUIDs from search results
-        chart_uuids = [result["CHART_UUID"] for result in search_results]
-        
         # Get charts by UUIDs
         filtered_charts = self.data_service.get_charts_by_uuids(chart_uuids)
         
@@ -0,0 +1,599 @@
+"""
+Chart specification module for the Agent Charts application.
+Caches parsed Vega-Lite specifications and binds only the data a chart needs.
+"""
+
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import vl_convert
+except ImportError:
+    vl_convert = None
+
+# Keys of composed views whose child specifications may have their own encodings
+_COMPOSITION_KEYS = ('layer', 'concat', 'hconcat', 'vconcat')
+
+# Keys whose fields are not tracked by referenced_fields
+_UNTRACKED_KEYS = ('transform', 'repeat')
+
+# Marks drawn as connected lines, which can be downsampled with LTTB
+_LINE_MARKS = {'line', 'area', 'trail'}
+
+# Marks drawn as independent points, which thumbnails can sample evenly
+_POINT_MARKS = {'point', 'circle', 'square', 'tick'}
+
+# Keys of interactive features that thumbnails do not need
+_INTERACTIVE_KEYS = ('params', 'selection')
+
+
+def spec_hash(chart_spec: str) -> str:
+    """
+    Compute the hash of a JSON chart specification.
+    
+    Args:
+        chart_spec: JSON chart specification
+    
+    Returns:
+        str: SHA-256 hex digest of the specification text
+    """
+    return hashlib.sha256(chart_spec.encode('utf-8')).hexdigest()
+
+
+def mark_type(spec: Dict) -> Optional[str]:
+    """
+    Get the mark type of a Vega-Lite specification.
+    
+    Args:
+        spec: Parsed Vega-Lite specification
+    
+    Returns:
+        str or None if the specification has no mark
+    """
+    mark = spec.get('mark')
+    return mark.get('type') if isinstance(mark, dict) else mark
+
+
+def referenced_fields(spec: Dict) -> Optional[Set[str]]:
+    """
+    Collect the data fields referenced by the encodings of a specification.
+    
+    Composed views and facets are searched recursively. Specifications using
+    transforms, repeats or expressions on datum can reference fields that are
+    not listed in encodings, so no fields are returned for them.
+    
+    Args:
+        spec: Parsed Vega-Lite specification
+    
+    Returns:
+        Set of field names, or None if the referenced fields cannot be determined
+    """
+    if 'datum' in json.dumps(spec):
+        return None
+    
+    fields = set()
+    
+    def add_field(definition) -> bool:
+        field = definition.get('field')
+        if field is None:
+            return True
+        if not isinstance(field, str):
+            return False
+        fields.add(field.replace('\\.', '.'))
+        return True
+    
+    stack = [spec]
+    while stack:
+        node = stack.pop()
+        if any(key in node for key in _UNTRACKED_KEYS):
+            return None
+        
+        definitions = []
+        for channel_definition in node.get('encoding', {}).values():
+            definitions.extend(channel_definition if isinstance(channel_definition, list) else [channel_definition])
+        facet = node.get('facet')
+        if isinstance(facet, dict):
+            definitions.extend(facet.values() if 'field' not in facet else [facet])
+        
+        while definitions:
+            definition = definitions.pop()
+            if not isinstance(definition, dict):
+                continue
+            if not add_field(definition):
+                return None
+            condition = definition.get('condition')
+            definitions.extend(condition if isinstance(condition, list) else [condition])
+            if isinstance(definition.get('sort'), dict):
+                definitions.append(definition['sort'])
+        
+        if isinstance(node.get('spec'), dict):
+            stack.append(node['spec'])
+        for key in _COMPOSITION_KEYS:
+            stack.extend(child for child in node.get(key, []) if isinstance(child, dict))
+    return fields
+
+
+class ChartSpecCache:
+    """
+    Process-wide LRU cache of parsed chart specifications.
+    
+    Specifications are keyed by chart UUID and validated with the hash of
+    their JSON text, so a changed specification is parsed again. The fields
+    referenced by a specification are computed once when it is parsed.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, chart_spec: str, chart_uuid: Optional[str] = None) -> Tuple[Dict, Optional[Set[str]]]:
+        """
+        Get a parsed chart specification, parsing it on a cache miss.
+        
+        The returned specification is a shallow copy, so callers can set
+        top-level keys like 'data' without changing the cached specification.
+        
+        Args:
+            chart_spec: JSON chart specification
+            chart_uuid: UUID of the chart (default: keyed by the specification hash)
+        
+        Returns:
+            Tuple of (parsed specification, referenced fields or None)
+        
+        Raises:
+            json.JSONDecodeError: If the specification is not valid JSON
+        """
+        digest = spec_hash(chart_spec)
+        key = chart_uuid if chart_uuid is not None else digest
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == digest:
+                self._entries.move_to_end(key)
+                return dict(entry[1]), entry[2]
+        
+        spec = json.loads(chart_spec)
+        fields = referenced_fields(spec)
+        with self._lock:
+            self._entries[key] = (digest, spec, fields)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(spec), fields
+    
+    def invalidate(self, chart_uuid: str):
+        """
+        Remove the cached specification of a chart.
+        
+        Args:
+            chart_uuid: UUID of the chart
+        """
+        with self._lock:
+            self._entries.pop(chart_uuid, None)
+    
+    def clear(self):
+        """Remove all cached specifications."""
+        with self._lock:
+            self._entries.clear()
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select points of a line with Largest-Triangle-Three-Buckets downsampling.
+    
+    The first and last points are kept. The points in between are split into
+    threshold - 2 buckets, and from each bucket the point forming the largest
+    triangle with the previously selected point and the average of the next
+    bucket is kept.
+    
+    Args:
+        x: X values, sorted ascending
+        y: Y values
+        threshold: Number of points to select
+    
+    Returns:
+        Array of selected row positions
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    bucket_edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end = bucket_edges[bucket], bucket_edges[bucket + 1]
+        next_end = bucket_edges[bucket + 2] if bucket + 2 < len(bucket_edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs(
+            (x[selected] - next_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (next_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def downsample_line(data: pd.DataFrame, x_field: str, y_field: str, group_fields: List[str],
+                    max_points: int) -> pd.DataFrame:
+    """
+    Downsample the lines of a line chart with LTTB.
+    
+    Args:
+        data: Chart data
+        x_field: Field of the x encoding (quantitative or temporal)
+        y_field: Field of the y encoding (quantitative)
+        group_fields: Fields splitting the data into separate lines (e.g. color)
+        max_points: Maximum number of points over all lines
+    
+    Returns:
+        DataFrame with at most max_points rows, or data if it cannot be downsampled
+    """
+    groups = data.groupby(group_fields, sort=False, dropna=False) if group_fields else [(None, data)]
+    group_count = data[group_fields].drop_duplicates().shape[0] if group_fields else 1
+    threshold = max_points // group_count
+    if threshold < 3:
+        return data
+    
+    sampled = []
+    for _, group in groups:
+        x = group[x_field]
+        if pd.api.types.is_numeric_dtype(x):
+            x_values = x.to_numpy(dtype='float64', na_value=np.nan)
+        else:
+            x = pd.to_datetime(x)
+            x_values = np.where(x.isna(), np.nan, x.to_numpy(dtype='datetime64[ns]').astype('int64').astype('float64'))
+        y_values = pd.to_numeric(group[y_field], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        valid = np.isfinite(x_values) & np.isfinite(y_values)
+        group, x_values, y_values = group[valid], x_values[valid], y_values[valid]
+        order = np.argsort(x_values, kind='stable')
+        group, x_values, y_values = group.iloc[order], x_values[order], y_values[order]
+        sampled.append(group.iloc[lttb_indices(x_values, y_values, threshold)])
+    return pd.concat(sampled) if sampled else data
+
+
+def nice_bin_edges(values: np.ndarray, maxbins: int = 10, step: Optional[float] = None) -> np.ndarray:
+    """
+    Compute bin edges with a step of 1, 2 or 5 times a power of ten, like Vega-Lite.
+    
+    Args:
+        values: Numeric values to bin
+        maxbins: Maximum number of bins
+        step: Fixed bin step (default: derived from maxbins)
+    
+    Returns:
+        Array of bin edges
+    """
+    low, high = float(values.min()), float(values.max())
+    if step is None:
+        span = high - low
+        if span == 0:
+            step = 1.0
+        else:
+            raw_step = span / maxbins
+            magnitude = 10 ** math.floor(math.log10(raw_step))
+            step = next(multiple * magnitude for multiple in (1, 2, 5, 10) if multiple * magnitude >= raw_step)
+    start = math.floor(low / step) * step
+    stop = max(math.ceil(high / step) * step, start + step)
+    return start + step * np.arange(round((stop - start) / step) + 1)
+
+
+def prebin_histogram(spec: Dict, data: pd.DataFrame) -> Tuple[Dict, pd.DataFrame]:
+    """
+    Replace a binned count histogram by pre-binned data.
+    
+    The encoding is rewritten to Vega-Lite's pre-binned form, so the browser
+    receives one row per bin instead of one row per value.
+    
+    Args:
+        spec: Parsed Vega-Lite specification with a bar mark
+        data: Chart data
+    
+    Returns:
+        Tuple of (specification, data), unchanged if the chart is not a count histogram
+    """
+    encoding = spec.get('encoding', {})
+    for bin_channel, count_channel in (('x', 'y'), ('y', 'x')):
+        bin_definition = encoding.get(bin_channel)
+        count_definition = encoding.get(count_channel)
+        if not isinstance(bin_definition, dict) or not isinstance(count_definition, dict):
+            continue
+        bin_parameters = bin_definition.get('bin')
+        if not bin_parameters or bin_definition.get('type') != 'quantitative' or 'field' not in bin_definition:
+            continue
+        if count_definition.get('aggregate') != 'count' or 'field' in count_definition:
+            continue
+        if any(isinstance(definition, dict) and 'field' in definition
+               for channel, definition in encoding.items() if channel not in (bin_channel, count_channel)):
+            continue
+        bin_parameters = bin_parameters if isinstance(bin_parameters, dict) else {}
+        if bin_parameters.get('binned'):
+            continue
+        
+        values = pd.to_numeric(data[bin_definition['field']], errors='coerce').dropna().to_numpy()
+        if len(values) == 0:
+            continue
+        edges = nice_bin_edges(values, bin_parameters.get('maxbins', 10), bin_parameters.get('step'))
+        counts, _ = np.histogram(values, bins=edges)
+        binned_data = pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+        
+        encoding = dict(encoding)
+        encoding[bin_channel] = {
+            **{key: value for key, value in bin_definition.items() if key not in ('bin', 'field')},
+            'field': 'bin_start',
+            'bin': {'binned': True, 'step': float(edges[1] - edges[0])},
+            'title': bin_definition.get('title', bin_definition['field'])
+        }
+        encoding[f'{bin_channel}2'] = {'field': 'bin_end'}
+        encoding[count_channel] = {
+            **{key: value for key, value in count_definition.items() if key != 'aggregate'},
+            'field': 'count',
+            'type': 'quantitative',
+            'title': count_definition.get('title', 'Count of Records')
+        }
+        return {**spec, 'encoding': encoding}, binned_data
+    return spec, data
+
+
+def downsample(spec: Dict, data: pd.DataFrame, max_points: int) -> Tuple[Dict, pd.DataFrame]:
+    """
+    Reduce the data of a single-view chart to what the browser needs to draw it.
+    
+    Line, area and trail charts over a quantitative or temporal x axis are
+    downsampled with LTTB, and count histograms are pre-binned. Other charts
+    are returned unchanged.
+    
+    Args:
+        spec: Parsed Vega-Lite specification
+        data: Chart data
+        max_points: Maximum number of rows of line charts
+    
+    Returns:
+        Tuple of (specification, data)
+    """
+    if any(key in spec for key in _COMPOSITION_KEYS + ('facet', 'spec')):
+        return spec, data
+    
+    mark = mark_type(spec)
+    if mark == 'bar':
+        return prebin_histogram(spec, data)
+    if mark not in _LINE_MARKS:
+        return spec, data
+    
+    encoding = spec.get('encoding', {})
+    x, y = encoding.get('x'), encoding.get('y')
+    if not isinstance(x, dict) or not isinstance(y, dict):
+        return spec, data
+    if x.get('type') not in ('quantitative', 'temporal') or y.get('type') != 'quantitative':
+        return spec, data
+    if any(key in definition for definition in (x, y) for key in ('aggregate', 'bin', 'timeUnit')):
+        return spec, data
+    if x.get('field') not in data.columns or y.get('field') not in data.columns:
+        return spec, data
+    
+    group_fields = []
+    for channel, definition in encoding.items():
+        if channel in ('x', 'y', 'tooltip') or not isinstance(definition, dict) or 'field' not in definition:
+            continue
+        if definition['field'] not in data.columns:
+            return spec, data
+        group_fields.append(definition['field'])
+    return spec, downsample_line(data, x['field'], y['field'], list(dict.fromkeys(group_fields)), max_points)
+
+
+def bind_chart_data(spec: Dict, fields: Optional[Set[str]], data: pd.DataFrame,
+                    max_points: int) -> Dict:
+    """
+    Attach chart data to a parsed specification.
+    
+    The data is projected to the referenced fields and downsampled if it has
+    more than max_points rows, which keeps the payload sent to the browser small.
+    
+    Args:
+        spec: Parsed Vega-Lite specification (modified in place)
+        fields: Fields referenced by the specification, or None to keep all columns
+        data: Chart data
+        max_points: Row count above which the data is downsampled
+    
+    Returns:
+        dict: Specification with the bound data
+    """
+    if fields and fields.issubset(data.columns):
+        data = data[[column for column in data.columns if column in fields]]
+    if len(data) > max_points:
+        spec, data = downsample(spec, data, max_points)
+    spec['data'] = data
+    return spec
+
+
+class ThumbnailCache:
+    """
+    Process-wide LRU cache of rendered chart thumbnails.
+    
+    Thumbnails are keyed by chart UUID and validated with the hash of the
+    chart specification, so a changed specification is rendered again.
+    The cache is bounded by the estimated size of the thumbnails, since
+    thumbnails of marks that cannot be reduced keep all of their data.
+    """
+    
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, chart_uuid: str, chart_spec: str) -> Optional[Union[str, Dict]]:
+        """
+        Get the cached thumbnail of a chart.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            chart_spec: JSON chart specification
+        
+        Returns:
+            SVG text, thumbnail specification or None if the thumbnail is not cached
+        """
+        digest = spec_hash(chart_spec)
+        with self._lock:
+            entry = self._entries.get(chart_uuid)
+            if entry is None or entry[0] != digest:
+                return None
+            self._entries.move_to_end(chart_uuid)
+            return entry[1]
+    
+    def put(self, chart_uuid: str, chart_spec: str, thumbnail: Union[str, Dict]) -> bool:
+        """
+        Store the thumbnail of a chart, evicting least recently used thumbnails if needed.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            chart_spec: JSON chart specification
+            thumbnail: SVG text or thumbnail specification
+        
+        Returns:
+            bool: True if the thumbnail was cached
+        """
+        size = thumbnail_bytes(thumbnail)
+        if size > self.max_entry_bytes:
+            return False
+        
+        with self._lock:
+            self._remove(chart_uuid)
+            while self._entries and self._total_bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            self._entries[chart_uuid] = (spec_hash(chart_spec), thumbnail, size)
+            self._total_bytes += size
+        return True
+    
+    def invalidate(self, chart_uuid: str):
+        """
+        Remove the cached thumbnail of a chart.
+        
+        Args:
+            chart_uuid: UUID of the chart
+        """
+        with self._lock:
+            self._remove(chart_uuid)
+    
+    def clear(self):
+        """Remove all cached thumbnails."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    def _remove(self, chart_uuid: str):
+        """Remove a thumbnail if it is cached. The caller holds the lock."""
+        entry = self._entries.pop(chart_uuid, None)
+        if entry is not None:
+            self._total_bytes -= entry[2]
+
+
+def thumbnail_bytes(thumbnail: Union[str, Dict]) -> int:
+    """
+    Estimate the memory size of a thumbnail.
+    
+    Args:
+        thumbnail: SVG text or thumbnail specification with a DataFrame as data
+    
+    Returns:
+        int: Estimated size in bytes
+    """
+    if isinstance(thumbnail, str):
+        return len(thumbnail.encode('utf-8'))
+    data = thumbnail.get('data')
+    if isinstance(data, pd.DataFrame):
+        spec_size = len(json.dumps({key: value for key, value in thumbnail.items() if key != 'data'}, default=str))
+        return spec_size + int(data.memory_usage(index=True, deep=True).sum())
+    return len(json.dumps(thumbnail, default=str))
+
+
+def strip_interactivity(spec: Dict) -> Dict:
+    """
+    Remove selections, parameters and tooltips from a specification and its views.
+    
+    Args:
+        spec: Parsed Vega-Lite specification
+    
+    Returns:
+        dict: Copy of the specification without interactive features
+    """
+    spec = {key: value for key, value in spec.items() if key not in _INTERACTIVE_KEYS}
+    if isinstance(spec.get('encoding'), dict):
+        spec['encoding'] = {channel: definition for channel, definition in spec['encoding'].items()
+                            if channel != 'tooltip'}
+    if isinstance(spec.get('mark'), dict):
+        spec['mark'] = {key: value for key, value in spec['mark'].items() if key != 'tooltip'}
+    if isinstance(spec.get('spec'), dict):
+        spec['spec'] = strip_interactivity(spec['spec'])
+    for key in _COMPOSITION_KEYS:
+        if isinstance(spec.get(key), list):
+            spec[key] = [strip_interactivity(child) if isinstance(child, dict) else child for child in spec[key]]
+    return spec
+
+
+def thumbnail_spec(spec: Dict, fields: Optional[Set[str]], data: pd.DataFrame,
+                   max_points: int, height: int) -> Dict:
+    """
+    Build a lightweight, non-interactive version of a chart.
+    
+    The thumbnail binds at most max_points rows where the data can be reduced
+    without changing what the chart shows: lines are downsampled with LTTB,
+    histograms are pre-binned and unaggregated point charts are sampled evenly.
+    
+    Args:
+        spec: Parsed Vega-Lite specification
+        fields: Fields referenced by the specification, or None if unknown
+        data: Chart data
+        max_points: Maximum number of rows to bind where the data can be reduced
+        height: Height of the thumbnail in pixels
+    
+    Returns:
+        dict: Thumbnail specification with the bound data
+    """
+    spec = strip_interactivity(spec)
+    if fields is not None:
+        fields = referenced_fields(spec)
+    if (len(data) > max_points and mark_type(spec) in _POINT_MARKS
+            and not any(key in spec for key in _COMPOSITION_KEYS + ('facet', 'spec', 'transform'))
+            and 'aggregate' not in json.dumps(spec)):
+        data = data.iloc[::math.ceil(len(data) / max_points)]
+    spec = bind_chart_data(spec, fields, data, max_points)
+    spec['height'] = height
+    return spec
+
+
+def render_svg(spec: Dict, width: int = 400) -> Optional[str]:
+    """
+    Render a thumbnail specification to a static SVG image.
+    
+    Requires the optional vl-convert-python package.
+    
+    Args:
+        spec: Thumbnail specification with a DataFrame as data
+        width: Width of the image in pixels
+    
+    Returns:
+        str: SVG text, or None if vl-convert is not installed or rendering failed
+    """
+    if vl_convert is None:
+        return None
+    data = spec['data']
+    static_spec = {
+        **spec,
+        'width': width,
+        'data': {'values': json.loads(data.to_json(orient='records', date_format='iso'))}
+    }
+    try:
+        return vl_convert.vegalite_to_svg(static_spec)
+    except Exception:
+        return None
\ No newline at end of file
@@ -13,7 +13,15 @@ load_dotenv()
 DATABASE_CONFIG = {
     "chart_table": "AI_DEVELOPMENT.PUBLIC.AGENT_GENERATED_CHARTS",
     "favorites_table": "AI_DEVELOPMENT.PUBLIC.AGENT_GENERATED_CHARTS_FAVORITES",
-    "chart_search_service": "chart_search_service"
+    "snapshot_table": "AI_DEVELOPMENT.PUBLIC.AGENT_GENERATED_CHARTS_SNAPSHOTS",
+    "snapshot_procedure": "AI_DEVELOPMENT.PUBLIC.SAVE_CHART_SNAPSHOT",
+    "chart_search_service": "chart_search_service",
+    # Dynamic table maintained by Snowflake, read with LIMIT queries by the gallery pages
+    "gallery_table": "AI_DEVELOPMENT.PUBLIC.AGENT_GENERATED_CHARTS_GALLERY",
+    "use_gallery_views": True,
+    # Columns loaded for chart listings; details are fetched for visible charts only
+    "chart_list_columns": ["CHART_UUID", "CREATION_TIMESTAMP", "USER_NAME", "QUESTION", "SEMANTIC_VIEW_NAME"],
+    "chart_detail_columns": ["CHART_SPEC", "SQL_QUERY"]
 }
 
 def get_connection_params():
@@ -47,7 +55,65 @@ UI_CONFIG = {
     "page_title": "Agent Generated Charts",
     "layout": "wide",
     "charts_per_page": 20,
-    "search_limit": 10
+    "search_limit": 10,
+    # Gallery tiles show a static preview until the interactive chart is requested
+    "thumbnail_mode": True,
+    "thumbnail_height": 180,
+    "thumbnail_max_points": 500
+}
+
+# Query execution configuration
+QUERY_CONFIG = {
+    "max_concurrent_queries": 8,
+    "query_timeout_seconds": 60,
+    "poll_interval_seconds": 0.2
+}
+
+# Chart search configuration
+SEARCH_CONFIG = {
+    "min_query_length": 3,
+    "cache_max_entries": 256,
+    "cache_ttl_seconds": 300
+}
+
+# Chart catalog configuration (shared by all sessions)
+CATALOG_CONFIG = {
+    "refresh_interval_seconds": 5,
+    "watermark_lookback_seconds": 300,
+    # Favorites are reloaded completely at most this often without change tracking
+    "max_full_reload_interval_seconds": 300
+}
+
+# Gallery table configuration (shared by all sessions)
+GALLERY_CONFIG = {
+    # After a failed query the gallery table is retried with a doubling delay
+    "retry_delay_seconds": 10,
+    "max_retry_delay_seconds": 300,
+    # Pages come from the catalog this long after it changed, at least the TARGET_LAG of the gallery table
+    "catalog_preferred_seconds": 90
+}
+
+# Favorites write queue configuration
+FAVORITES_CONFIG = {
+    "flush_interval_seconds": 2,
+    "max_batch_size": 500,
+    "max_retry_delay_seconds": 60
+}
+
+# Chart result cache configuration (shared by all sessions)
+CACHE_CONFIG = {
+    "max_bytes": 256 * 1024 * 1024,
+    "max_entry_bytes": 32 * 1024 * 1024,
+    "max_age_seconds": 3600
+}
+
+# Chart specification configuration (shared by all sessions)
+SPEC_CONFIG = {
+    "cache_max_entries": 512,
+    "max_points": 5000,
+    # Thumbnails of marks that cannot be reduced keep all rows, so the cache is bounded by size
+    "thumbnail_cache_max_bytes": 64 * 1024 * 1024,
+    "thumbnail_max_entry_bytes": 2 * 1024 * 1024
 }
 
 # Chart styling configuration
@@ -0,0 +1,9 @@
+"""
+Test configuration for the Agent Charts application.
+Makes the application modules importable the same way Streamlit imports them.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
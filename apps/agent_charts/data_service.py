@@ -5,11 +5,501 @@ Handles all database operations, chart data processing, and favorites management
 
 import streamlit as st
 import pandas as pd
+import atexit
+import hashlib
+import io
 import json
-from typing import List, Dict, Optional, Tuple
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, List, Dict, Optional, Tuple, Union
+
+from snowflake.snowpark import Session
+from snowflake.snowpark import functions as F
 
 from session_manager import get_session_manager
-from config import DATABASE_CONFIG, UI_CONFIG
+from catalog import get_chart_catalog
+from gallery import GalleryViews
+from chart_spec import ChartSpecCache, ThumbnailCache, bind_chart_data, thumbnail_spec, render_svg
+from config import (
+    DATABASE_CONFIG, UI_CONFIG, QUERY_CONFIG, CACHE_CONFIG, FAVORITES_CONFIG, SEARCH_CONFIG, SPEC_CONFIG,
+    GALLERY_CONFIG
+)
+
+
+# Matches string literals, quoted identifiers and comments in SQL text
+_SQL_TOKEN_PATTERN = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/",
+    re.DOTALL
+)
+
+
+def normalize_sql(sql_query: str) -> str:
+    """
+    Normalize SQL text so that formatting-only differences map to the same query.
+    
+    Comments are removed, whitespace is collapsed and keywords/identifiers are
+    lower-cased. String literals and quoted identifiers are kept verbatim.
+    
+    Args:
+        sql_query: SQL query to normalize
+    
+    Returns:
+        str: Normalized SQL query
+    """
+    def normalize_segment(segment: str) -> str:
+        segment = re.sub(r'\s+', ' ', segment).lower()
+        return re.sub(r'\s*([(),])\s*', r'\1', segment)
+    
+    parts = []
+    position = 0
+    for match in _SQL_TOKEN_PATTERN.finditer(sql_query):
+        parts.append(normalize_segment(sql_query[position:match.start()]))
+        token = match.group(0)
+        parts.append(' ' if token.startswith(('--', '/*')) else token)
+        position = match.end()
+    parts.append(normalize_segment(sql_query[position:]))
+    
+    return re.sub(r' {2,}', ' ', ''.join(parts)).strip().rstrip(';').strip()
+
+
+def sql_fingerprint(sql_query: str) -> str:
+    """
+    Compute a stable fingerprint of a SQL query based on its normalized text.
+    
+    Args:
+        sql_query: SQL query to fingerprint
+    
+    Returns:
+        str: SHA-256 hex digest of the normalized query
+    """
+    return hashlib.sha256(normalize_sql(sql_query).encode('utf-8')).hexdigest()
+
+
+class ChartResultCache:
+    """
+    Process-wide LRU cache for chart query results.
+    
+    Results are keyed by the SQL fingerprint and stored as Parquet bytes.
+    The cache is bounded by the total size of all stored results, and
+    results larger than the per-entry limit are never cached.
+    """
+    
+    def __init__(self, max_bytes: int, max_entry_bytes: int, max_age_seconds: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.max_age_seconds = max_age_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._rejections = 0
+    
+    def get(self, sql_query: str) -> Optional[pd.DataFrame]:
+        """
+        Get the cached result of a query.
+        
+        Args:
+            sql_query: SQL query to look up
+        
+        Returns:
+            DataFrame or None if the query result is not cached
+        """
+        key = sql_fingerprint(sql_query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[1]):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            payload = entry[0]
+        return pd.read_parquet(io.BytesIO(payload))
+    
+    def put(self, sql_query: str, data: pd.DataFrame) -> bool:
+        """
+        Store the result of a query, evicting least recently used results if needed.
+        
+        Args:
+            sql_query: SQL query that produced the result
+            data: Query result
+        
+        Returns:
+            bool: True if the result was cached
+        """
+        try:
+            buffer = io.BytesIO()
+            data.to_parquet(buffer, index=False)
+            payload = buffer.getvalue()
+        except Exception:
+            with self._lock:
+                self._rejections += 1
+            return False
+        
+        key = sql_fingerprint(sql_query)
+        with self._lock:
+            if len(payload) > self.max_entry_bytes:
+                self._rejections += 1
+                return False
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and self._total_bytes + len(payload) > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+            self._entries[key] = (payload, time.monotonic())
+            self._total_bytes += len(payload)
+        return True
+    
+    def invalidate(self, sql_query: str):
+        """
+        Remove the cached result of a query.
+        
+        Args:
+            sql_query: SQL query to invalidate
+        """
+        key = sql_fingerprint(sql_query)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            dict: Entry count, size in bytes, hits, misses, evictions and rejections
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "rejections": self._rejections
+            }
+    
+    def _is_expired(self, stored_at: float) -> bool:
+        """Check whether an entry stored at the given time has expired."""
+        return self.max_age_seconds is not None and time.monotonic() - stored_at > self.max_age_seconds
+    
+    def _remove(self, key: str):
+        """Remove an entry. Must be called while holding the lock."""
+        payload, _ = self._entries.pop(key)
+        self._total_bytes -= len(payload)
+
+
+@st.cache_resource
+def get_chart_result_cache() -> ChartResultCache:
+    """
+    Get the chart result cache shared by all sessions of this process.
+    
+    Returns:
+        ChartResultCache: The shared chart result cache
+    """
+    return ChartResultCache(
+        max_bytes=CACHE_CONFIG["max_bytes"],
+        max_entry_bytes=CACHE_CONFIG["max_entry_bytes"],
+        max_age_seconds=CACHE_CONFIG["max_age_seconds"]
+    )
+
+
+@st.cache_resource
+def get_chart_spec_cache() -> ChartSpecCache:
+    """
+    Get the chart specification cache shared by all sessions of this process.
+    
+    Returns:
+        ChartSpecCache: The shared chart specification cache
+    """
+    return ChartSpecCache(max_entries=SPEC_CONFIG["cache_max_entries"])
+
+
+@st.cache_resource
+def get_gallery_views() -> Optional[GalleryViews]:
+    """
+    Get the gallery views shared by all sessions of this process.
+    
+    Returns:
+        GalleryViews: The shared gallery views, or None if they are disabled
+    """
+    if not DATABASE_CONFIG["use_gallery_views"]:
+        return None
+    return GalleryViews(
+        session=get_session_manager().session,
+        retry_delay_seconds=GALLERY_CONFIG["retry_delay_seconds"],
+        max_retry_delay_seconds=GALLERY_CONFIG["max_retry_delay_seconds"]
+    )
+
+
+@st.cache_resource
+def get_thumbnail_cache() -> ThumbnailCache:
+    """
+    Get the chart thumbnail cache shared by all sessions of this process.
+    
+    Returns:
+        ThumbnailCache: The shared chart thumbnail cache
+    """
+    return ThumbnailCache(
+        max_bytes=SPEC_CONFIG["thumbnail_cache_max_bytes"],
+        max_entry_bytes=SPEC_CONFIG["thumbnail_max_entry_bytes"]
+    )
+
+
+def normalize_search_query(query: str) -> str:
+    """
+    Normalize a search query so equivalent queries share a cache entry.
+    
+    Args:
+        query: Search query as entered by the user
+    
+    Returns:
+        str: Lowercased query with collapsed whitespace
+    """
+    return " ".join(query.lower().split())
+
+
+class SearchResultCache:
+    """
+    Process-wide LRU cache for chart search results.
+    
+    Results are keyed by the normalized query and the result limit and store
+    the ranked chart UUIDs. Entries expire after a fixed time so new charts
+    show up in search results.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, query: str, limit: int) -> Optional[List[str]]:
+        """
+        Get the cached result of a search.
+        
+        Args:
+            query: Normalized search query
+            limit: Maximum number of results
+        
+        Returns:
+            List of chart UUIDs or None if the search is not cached
+        """
+        key = (query, limit)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            chart_uuids, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return list(chart_uuids)
+    
+    def put(self, query: str, limit: int, chart_uuids: List[str]):
+        """
+        Store the result of a search, evicting the least recently used entries.
+        
+        Args:
+            query: Normalized search query
+            limit: Maximum number of results
+            chart_uuids: Ranked chart UUIDs returned by the search
+        """
+        key = (query, limit)
+        with self._lock:
+            self._entries[key] = (tuple(chart_uuids), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove all cached search results."""
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource
+def get_search_result_cache() -> SearchResultCache:
+    """
+    Get the search result cache shared by all sessions of this process.
+    
+    Returns:
+        SearchResultCache: The shared search result cache
+    """
+    return SearchResultCache(
+        max_entries=SEARCH_CONFIG["cache_max_entries"],
+        ttl_seconds=SEARCH_CONFIG["cache_ttl_seconds"]
+    )
+
+
+class FavoritesWriteQueue:
+    """
+    Write-behind queue for favorite changes.
+    
+    Favorite toggles are recorded as the desired state per (chart, user), so
+    repeated toggles of the same chart coalesce into a single change. A
+    background thread writes pending changes in batches with one MERGE
+    statement. The MERGE only inserts missing and deletes existing favorites,
+    so failed batches can be retried without creating duplicates.
+    """
+    
+    def __init__(self, session: Session, flush_interval_seconds: float, max_batch_size: int,
+                 max_retry_delay_seconds: float):
+        self.session = session
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_batch_size = max_batch_size
+        self.max_retry_delay_seconds = max_retry_delay_seconds
+        self.last_error = None
+        self._pending: Dict[Tuple[str, str], bool] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="favorites-write-queue", daemon=True)
+        self._thread.start()
+    
+    def enqueue(self, chart_uuid: str, user_name: str, is_favorite: bool):
+        """
+        Record the new favorite state of a chart for a user.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            user_name: Name of the user
+            is_favorite: Whether the chart should be a favorite of the user
+        """
+        with self._lock:
+            self._pending[(chart_uuid, user_name)] = is_favorite
+            if len(self._pending) >= self.max_batch_size:
+                self._wake_up.set()
+    
+    def pending_count(self) -> int:
+        """Get the number of favorite changes that are not written yet."""
+        return len(self._pending)
+    
+    def pending_changes(self) -> Dict[Tuple[str, str], bool]:
+        """Get the favorite changes that are not written yet by (chart_uuid, user_name)."""
+        with self._lock:
+            return dict(self._pending)
+    
+    def flush(self) -> bool:
+        """
+        Write all pending favorite changes.
+        
+        Returns:
+            bool: True if all changes were written
+        """
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = dict(list(self._pending.items())[:self.max_batch_size])
+                if not batch:
+                    return True
+                
+                try:
+                    self._merge(batch)
+                except Exception as e:
+                    self.last_error = str(e)
+                    return False
+                
+                with self._lock:
+                    # Keep changes that were toggled again while writing
+                    for key, is_favorite in batch.items():
+                        if self._pending.get(key) == is_favorite:
+                            del self._pending[key]
+    
+    def _merge(self, batch: Dict[Tuple[str, str], bool]):
+        """Write a batch of favorite changes with a single MERGE statement."""
+        values = ", ".join(["(?, ?, ?)"] * len(batch))
+        params = []
+        for (chart_uuid, user_name), is_favorite in batch.items():
+            params.extend([chart_uuid, user_name, is_favorite])
+        
+        self.session.sql(f"""
+            MERGE INTO {DATABASE_CONFIG['favorites_table']} AS favorites
+            USING (
+              SELECT column1 AS CHART_UUID, column2 AS USER_NAME, column3 AS IS_FAVORITE
+              FROM VALUES {values}
+            ) AS changes
+            ON favorites.CHART_UUID = changes.CHART_UUID AND favorites.USER_NAME = changes.USER_NAME
+            WHEN MATCHED AND NOT changes.IS_FAVORITE THEN
+              DELETE
+            WHEN NOT MATCHED AND changes.IS_FAVORITE THEN
+              INSERT (CHART_UUID, USER_NAME) VALUES (changes.CHART_UUID, changes.USER_NAME)
+        """, params=params).collect()
+    
+    def _run(self):
+        """Flush pending changes periodically, backing off while writes fail."""
+        delay = self.flush_interval_seconds
+        while True:
+            self._wake_up.wait(delay)
+            self._wake_up.clear()
+            if self.flush():
+                delay = self.flush_interval_seconds
+            else:
+                delay = min(delay * 2, self.max_retry_delay_seconds)
+
+
+@st.cache_resource
+def get_favorites_write_queue() -> FavoritesWriteQueue:
+    """
+    Get the favorites write queue shared by all sessions of this process.
+    
+    Returns:
+        FavoritesWriteQueue: The shared favorites write queue
+    """
+    write_queue = FavoritesWriteQueue(
+        session=get_session_manager().session,
+        flush_interval_seconds=FAVORITES_CONFIG["flush_interval_seconds"],
+        max_batch_size=FAVORITES_CONFIG["max_batch_size"],
+        max_retry_delay_seconds=FAVORITES_CONFIG["max_retry_delay_seconds"]
+    )
+    # Write remaining changes when the app server shuts down
+    atexit.register(write_queue.flush)
+    return write_queue
+
+
+def snapshot_query(chart_uuid: str) -> str:
+    """
+    Get the query identifying the snapshot of a chart in the result cache.
+    
+    Args:
+        chart_uuid: UUID of the chart
+    
+    Returns:
+        str: SQL query selecting the snapshot data of the chart
+    """
+    return f"SELECT CHART_DATA FROM {DATABASE_CONFIG['snapshot_table']} WHERE CHART_UUID = '{chart_uuid}'"
+
+
+def invalidate_changed_charts(chart_uuids: List[str], sql_queries: List[str]):
+    """
+    Remove the cached results of changed charts from the shared result cache.
+    
+    Args:
+        chart_uuids: UUIDs of the changed charts
+        sql_queries: SQL queries of the previous chart versions
+    """
+    result_cache = get_chart_result_cache()
+    for sql_query in sql_queries:
+        result_cache.invalidate(sql_query)
+    spec_cache = get_chart_spec_cache()
+    thumbnail_cache = get_thumbnail_cache()
+    for chart_uuid in chart_uuids:
+        result_cache.invalidate(snapshot_query(chart_uuid))
+        spec_cache.invalidate(chart_uuid)
+        thumbnail_cache.invalidate(chart_uuid)
 
 
 class ChartDataService:
@@ -18,9 +508,17 @@ class ChartDataService:
     def __init__(self):
         self.session_manager = get_session_manager()
         self.session = self.session_manager.session
+        self.result_cache = get_chart_result_cache()
+        self.spec_cache = get_chart_spec_cache()
+        self.thumbnail_cache = get_thumbnail_cache()
+        self.catalog = get_chart_catalog()
+        self.catalog.add_change_listener(invalidate_changed_charts)
+        self.favorites_queue = get_favorites_write_queue()
+        self.catalog.set_pending_favorites(self.favorites_queue.pending_changes)
+        self.search_cache = get_search_result_cache()
+        self.gallery = get_gallery_views()
     
-    @st.cache_data(ttl=600)
-    def get_chart_data(_self, sql_query: str) -> pd.DataFrame:
+    def get_chart_data(self, sql_query: str) -> pd.DataFrame:
         """
         Execute SQL query and return chart data with caching.
         
@@ -30,27 +528,186 @@ class ChartDataService:
         Returns:
             DataFrame: Query results
         """
+        cached_data = self.result_cache.get(sql_query)
+        if cached_data is not None:
+            return cached_data
+        
         try:
-            return _self.session.sql(sql_query).to_pandas()
+            chart_data = self.session.sql(sql_query).to_pandas()
         except Exception as e:
             st.error(f"Failed to execute query: {str(e)}")
             return pd.DataFrame()
+        
+        self.result_cache.put(sql_query, chart_data)
+        return chart_data
+    
+    def prefetch_chart_data(self, sql_queries: Tuple[str, ...]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """
+        Execute the SQL queries of a chart page concurrently.
+        
+        Cached results are served from the result cache. The remaining queries
+        are submitted as Snowpark async jobs, with at most
+        QUERY_CONFIG["max_concurrent_queries"] running at the same time.
+        Jobs exceeding QUERY_CONFIG["query_timeout_seconds"] are cancelled.
+        
+        Args:
+            sql_queries: SQL queries to execute (duplicates are executed once)
+        
+        Returns:
+            Tuple of (results, errors), both keyed by SQL query
+        """
+        max_concurrent = QUERY_CONFIG["max_concurrent_queries"]
+        timeout = QUERY_CONFIG["query_timeout_seconds"]
+        poll_interval = QUERY_CONFIG["poll_interval_seconds"]
+        
+        pending = deque()
+        running = {}
+        results = {}
+        errors = {}
+        
+        for sql_query in dict.fromkeys(query for query in sql_queries if query):
+            cached_data = self.result_cache.get(sql_query)
+            if cached_data is not None:
+                results[sql_query] = cached_data
+            else:
+                pending.append(sql_query)
+        
+        while pending or running:
+            # Submit new jobs until the worker limit is reached
+            while pending and len(running) < max_concurrent:
+                sql_query = pending.popleft()
+                try:
+                    job = self.session.sql(sql_query).to_pandas(block=False)
+                    running[sql_query] = (job, time.monotonic())
+                except Exception as e:
+                    errors[sql_query] = str(e)
+            
+            # Collect finished jobs and cancel the ones that timed out
+            for sql_query, (job, started_at) in list(running.items()):
+                if job.is_done():
+                    del running[sql_query]
+                    try:
+                        results[sql_query] = job.result()
+                        self.result_cache.put(sql_query, results[sql_query])
+                    except Exception as e:
+                        errors[sql_query] = str(e)
+                elif time.monotonic() - started_at > timeout:
+                    del running[sql_query]
+                    try:
+                        job.cancel()
+                    except Exception:
+                        pass
+                    errors[sql_query] = f"Query timed out after {timeout} seconds"
+            
+            if running:
+                time.sleep(poll_interval)
+        
+        return results, errors
     
-    def prepare_chart_specification(self, chart_spec: str, sql_query: str) -> Tuple[Dict, pd.DataFrame]:
+    def get_chart_snapshots(self, chart_uuids: Tuple[str, ...]) -> Dict[str, pd.DataFrame]:
+        """
+        Get the stored result snapshots for a list of charts.
+        
+        Snapshots are loaded with a single query for all charts that are not
+        in the result cache yet. Charts without a snapshot are omitted.
+        
+        Args:
+            chart_uuids: UUIDs of the charts
+        
+        Returns:
+            dict: Snapshot data keyed by chart UUID
+        """
+        snapshots = {}
+        missing_uuids = []
+        
+        for chart_uuid in dict.fromkeys(chart_uuids):
+            cached_data = self.result_cache.get(snapshot_query(chart_uuid))
+            if cached_data is not None:
+                snapshots[chart_uuid] = cached_data
+            else:
+                missing_uuids.append(chart_uuid)
+        
+        if not missing_uuids:
+            return snapshots
+        
+        try:
+            rows = (self.session.table(DATABASE_CONFIG["snapshot_table"])
+                   .filter(F.col('CHART_UUID').isin(missing_uuids))
+                   .select('CHART_UUID', 'CHART_COLUMNS', 'CHART_DATA')
+                   .collect())
+        except Exception as e:
+            st.error(f"Failed to load chart snapshots: {str(e)}")
+            return snapshots
+        
+        for row in rows:
+            snapshot_data = pd.DataFrame(json.loads(row['CHART_DATA']))
+            if row['CHART_COLUMNS'] is not None:
+                # Restore the column order of the chart query
+                chart_columns = [column for column in json.loads(row['CHART_COLUMNS'])
+                                 if column in snapshot_data.columns]
+                snapshot_data = snapshot_data[chart_columns + snapshot_data.columns.drop(chart_columns).tolist()]
+            snapshots[row['CHART_UUID']] = snapshot_data
+            self.result_cache.put(snapshot_query(row['CHART_UUID']), snapshot_data)
+        
+        return snapshots
+    
+    def refresh_chart_data(self, chart_uuid: str, sql_query: str) -> pd.DataFrame:
+        """
+        Re-run a chart query against the warehouse and update its snapshot.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            sql_query: SQL query of the chart
+        
+        Returns:
+            DataFrame: Fresh chart data
+        """
+        query = snapshot_query(chart_uuid)
+        self.result_cache.invalidate(query)
+        self.result_cache.invalidate(sql_query)
+        self.thumbnail_cache.invalidate(chart_uuid)
+        
+        try:
+            self.session.call(DATABASE_CONFIG["snapshot_procedure"], chart_uuid)
+            snapshot_data = self.get_chart_snapshots((chart_uuid,)).get(chart_uuid)
+            if snapshot_data is not None:
+                return snapshot_data
+        except Exception as e:
+            st.error(f"Failed to save chart snapshot: {str(e)}")
+        
+        # Results too large for a snapshot are queried live
+        return self.get_chart_data(sql_query)
+    
+    def prepare_chart_specification(self, chart_spec: str, sql_query: str,
+                                    chart_data: Optional[pd.DataFrame] = None,
+                                    chart_uuid: Optional[str] = None,
+                                    refresh: bool = False) -> Tuple[Dict, pd.DataFrame]:
         """
         Prepare chart specification with data for visualization.
         
+        Chart data is taken from the stored snapshot of the chart if one exists.
+        The SQL query is only executed for charts without a snapshot or when
+        a refresh is requested.
+        
+        Parsed specifications are cached by chart UUID. Only the fields used
+        by the encodings are bound to the specification, and large results are
+        downsampled, so the payload sent to the browser stays small. The
+        returned chart data is the full query result.
+        
         Args:
             chart_spec: JSON chart specification
             sql_query: SQL query to fetch chart data
+            chart_data: Already fetched chart data (skips query execution)
+            chart_uuid: UUID of the chart, used to look up its snapshot
+            refresh: Re-run the SQL query and update the snapshot
         
         Returns:
             Tuple of (chart_spec_dict, chart_data)
         """
         try:
-            chart_spec_dict = json.loads(chart_spec)
-            chart_data = self.get_chart_data(sql_query)
-            chart_spec_dict['data'] = chart_data
+            chart_spec_dict, fields = self.spec_cache.get(chart_spec, chart_uuid)
+            chart_data = self._load_chart_data(sql_query, chart_data, chart_uuid, refresh)
+            chart_spec_dict = bind_chart_data(chart_spec_dict, fields, chart_data, SPEC_CONFIG["max_points"])
             return chart_spec_dict, chart_data
         except json.JSONDecodeError as e:
             st.error(f"Invalid chart specification: {str(e)}")
@@ -59,6 +716,74 @@ class ChartDataService:
             st.error(f"Failed to prepare chart: {str(e)}")
             return {}, pd.DataFrame()
     
+    def get_cached_thumbnail(self, chart_uuid: str, chart_spec: str) -> Optional[Union[str, Dict]]:
+        """
+        Get the cached thumbnail of a chart without loading its data.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            chart_spec: JSON chart specification
+        
+        Returns:
+            SVG text, thumbnail specification or None if the thumbnail is not cached
+        """
+        return self.thumbnail_cache.get(chart_uuid, chart_spec)
+    
+    def prepare_chart_thumbnail(self, chart_spec: str, sql_query: str, chart_uuid: str,
+                                chart_data: Optional[pd.DataFrame] = None) -> Optional[Union[str, Dict]]:
+        """
+        Prepare a lightweight preview of a chart for gallery tiles.
+        
+        The thumbnail is rendered to a static SVG if vl-convert is installed,
+        otherwise it is a non-interactive specification with a reduced dataset.
+        Thumbnails are cached by chart UUID and specification hash, so later
+        renders need neither the chart data nor a query.
+        
+        Args:
+            chart_spec: JSON chart specification
+            sql_query: SQL query to fetch chart data
+            chart_uuid: UUID of the chart
+            chart_data: Already fetched chart data (skips query execution)
+        
+        Returns:
+            SVG text, thumbnail specification or None if the chart failed to load
+        """
+        thumbnail = self.thumbnail_cache.get(chart_uuid, chart_spec)
+        if thumbnail is not None:
+            return thumbnail
+        
+        try:
+            chart_spec_dict, fields = self.spec_cache.get(chart_spec, chart_uuid)
+            chart_data = self._load_chart_data(sql_query, chart_data, chart_uuid)
+            preview_spec = thumbnail_spec(
+                chart_spec_dict, fields, chart_data,
+                UI_CONFIG["thumbnail_max_points"], UI_CONFIG["thumbnail_height"]
+            )
+        except json.JSONDecodeError as e:
+            st.error(f"Invalid chart specification: {str(e)}")
+            return None
+        except Exception as e:
+            st.error(f"Failed to prepare chart thumbnail: {str(e)}")
+            return None
+        
+        thumbnail = render_svg(preview_spec) or preview_spec
+        # Empty results may come from failed queries, so they are not cached
+        if not chart_data.empty:
+            self.thumbnail_cache.put(chart_uuid, chart_spec, thumbnail)
+        return thumbnail
+    
+    def _load_chart_data(self, sql_query: str, chart_data: Optional[pd.DataFrame] = None,
+                         chart_uuid: Optional[str] = None, refresh: bool = False) -> pd.DataFrame:
+        """Get chart data from the given data, the chart snapshot or the SQL query, in this order."""
+        if chart_data is None and chart_uuid is not None:
+            if refresh:
+                chart_data = self.refresh_chart_data(chart_uuid, sql_query)
+            else:
+                chart_data = self.get_chart_snapshots((chart_uuid,)).get(chart_uuid)
+        if chart_data is None:
+            chart_data = self.get_chart_data(sql_query)
+        return chart_data
+    
     def get_favorite_count(self, chart_uuid: str) -> int:
         """
         Get the number of favorites for a specific chart.
@@ -69,13 +794,7 @@ class ChartDataService:
         Returns:
             int: Number of favorites
         """
-        try:
-            favorites_df = st.session_state.get('favorite_charts', pd.DataFrame())
-            if favorites_df.empty:
-                return 0
-            return len(favorites_df[favorites_df['CHART_UUID'] == chart_uuid])
-        except Exception:
-            return 0
+        return self.catalog.favorites.count(chart_uuid)
     
     def is_chart_favorited_by_user(self, chart_uuid: str, user_name: str) -> bool:
         """
@@ -88,21 +807,15 @@ class ChartDataService:
         Returns:
             bool: True if favorited by user
         """
-        try:
-            favorites_df = st.session_state.get('favorite_charts', pd.DataFrame())
-            if favorites_df.empty:
-                return False
-            return len(favorites_df[
-                (favorites_df['USER_NAME'] == user_name) & 
-                (favorites_df['CHART_UUID'] == chart_uuid)
-            ]) > 0
-        except Exception:
-            return False
+        return self.catalog.favorites.is_favorited(chart_uuid, user_name)
     
     def toggle_favorite(self, chart_uuid: str, user_name: str) -> bool:
         """
         Toggle favorite status for a chart.
         
+        The change is visible immediately and written to the database by the
+        favorites write queue.
+        
         Args:
             chart_uuid: UUID of the chart
             user_name: Name of the user
@@ -110,184 +823,251 @@ class ChartDataService:
         Returns:
             bool: True if operation was successful
         """
-        try:
-            is_favorite = self.is_chart_favorited_by_user(chart_uuid, user_name)
-            
-            if is_favorite:
-                # Remove from favorites
-                self.session.sql(f"""
-                    DELETE FROM {DATABASE_CONFIG['favorites_table']} 
-                    WHERE USER_NAME = '{user_name}' AND CHART_UUID = '{chart_uuid}'
-                """).collect()
-                
-                # Update session state
-                st.session_state['favorite_charts'] = st.session_state['favorite_charts'][
-                    ~((st.session_state['favorite_charts']['USER_NAME'] == user_name) &
-                      (st.session_state['favorite_charts']['CHART_UUID'] == chart_uuid))
-                ]
-                return True
-            else:
-                # Add to favorites
-                self.session.sql(f"""
-                    INSERT INTO {DATABASE_CONFIG['favorites_table']} (USER_NAME, CHART_UUID)
-                    VALUES ('{user_name}', '{chart_uuid}')
-                """).collect()
-                
-                # Update session state
-                new_favorite = pd.DataFrame({
-                    'USER_NAME': [user_name],
-                    'CHART_UUID': [chart_uuid]
-                })
-                st.session_state['favorite_charts'] = pd.concat([
-                    st.session_state['favorite_charts'], new_favorite
-                ], ignore_index=True)
-                return True
-                
-        except Exception as e:
-            st.error(f"Error updating favorites: {str(e)}")
-            return False
+        is_favorite = self.is_chart_favorited_by_user(chart_uuid, user_name)
+        
+        # Update the shared catalog right away and write to the database in the background
+        if is_favorite:
+            self.catalog.remove_favorite(chart_uuid, user_name)
+        else:
+            self.catalog.add_favorite(chart_uuid, user_name)
+        
+        self.favorites_queue.enqueue(chart_uuid, user_name, not is_favorite)
+        return True
     
-    def search_charts(self, query: str, limit: int = None) -> List[Dict]:
+    def search_charts(self, query: str, limit: int = None) -> List[str]:
         """
         Search for charts using the Cortex search service.
         
+        Results are cached per normalized query and limit, so reruns of the
+        search page do not repeat the search. Queries shorter than the
+        configured minimum length are not sent to the search service.
+        
+        The local search index of the chart catalog fills up results with
+        charts the search service has not indexed yet, and replaces the
+        search service while it is unavailable.
+        
         Args:
             query: Search query
             limit: Maximum number of results (default from config)
         
         Returns:
-            List of chart UUIDs matching the search
+            List of chart UUIDs matching the search, best match first
         """
-        if not query.strip():
+        normalized_query = normalize_search_query(query)
+        if len(normalized_query) < SEARCH_CONFIG["min_query_length"]:
             return []
         
+        search_limit = limit or UI_CONFIG["search_limit"]
+        cached_uuids = self.search_cache.get(normalized_query, search_limit)
+        if cached_uuids is not None:
+            return cached_uuids
+        
         try:
             search_service = self.session_manager.get_search_service()
-            search_limit = limit or UI_CONFIG["search_limit"]
             
             response = search_service.search(
-                query=query,
+                query=normalized_query,
                 columns=["CHART_UUID"],
                 limit=search_limit
             )
             
-            return response.results
+            chart_uuids = [result["CHART_UUID"] for result in response.results]
+        except Exception as e:
+            st.warning(f"Search service unavailable, showing local results: {str(e)}")
+            return self.search_local(normalized_query, search_limit)
+        
+        if len(chart_uuids) < search_limit:
+            local_uuids = self.search_local(normalized_query, search_limit)
+            chart_uuids += [chart_uuid for chart_uuid in local_uuids if chart_uuid not in chart_uuids]
+            chart_uuids = chart_uuids[:search_limit]
+        
+        self.search_cache.put(normalized_query, search_limit, chart_uuids)
+        return chart_uuids
+    
+    def search_local(self, query: str, limit: int = None) -> List[str]:
+        """
+        Search for charts using the local search index of the chart catalog.
+        
+        Args:
+            query: Search query
+            limit: Maximum number of results (default from config)
+        
+        Returns:
+            List of chart UUIDs matching the search, best match first
+        """
+        try:
+            return self.catalog.search_index.search(query, limit or UI_CONFIG["search_limit"])
         except Exception as e:
             st.error(f"Search failed: {str(e)}")
             return []
     
-    def get_charts_by_uuids(self, chart_uuids: List[str]) -> pd.DataFrame:
+    def get_chart_page(self, cursor: Optional[Tuple] = None, limit: int = None,
+                       user_name: Optional[str] = None) -> Tuple[pd.DataFrame, Optional[Tuple]]:
+        """
+        Get a page of charts, ordered from newest to oldest.
+        
+        Uses keyset pagination on (CREATION_TIMESTAMP, CHART_UUID). Pages are
+        read from the gallery table if enabled, otherwise from the shared
+        catalog. Only the listing columns are returned.
+        
+        Args:
+            cursor: (CREATION_TIMESTAMP, CHART_UUID) of the last chart of the previous page
+            limit: Maximum number of charts to return (default from config)
+            user_name: Only return charts created by this user
+        
+        Returns:
+            Tuple of (charts, next_cursor); next_cursor is None on the last page
+        """
+        chart_limit = limit or UI_CONFIG["charts_per_page"]
+        page = self._read_gallery(lambda gallery: gallery.recent_page(cursor, chart_limit, user_name=user_name))
+        if page is not None:
+            return page
+        return self.catalog.get_chart_page(cursor, chart_limit, user_name=user_name)
+    
+    def get_chart_details(self, chart_uuids: List[str]) -> pd.DataFrame:
+        """
+        Get the chart specifications and SQL queries for specific charts.
+        
+        Args:
+            chart_uuids: List of chart UUIDs
+        
+        Returns:
+            DataFrame: CHART_UUID, CHART_SPEC and SQL_QUERY of the charts
+        """
+        return self.get_charts_by_uuids(
+            chart_uuids, columns=['CHART_UUID'] + DATABASE_CONFIG["chart_detail_columns"]
+        )
+    
+    def get_charts_by_uuids(self, chart_uuids: List[str], columns: Optional[List[str]] = None) -> pd.DataFrame:
         """
         Get charts filtered by specific UUIDs, ordered by the provided UUID list.
         
+        Listing columns are served from the shared catalog, other columns are
+        queried from the chart table.
+        
         Args:
             chart_uuids: List of chart UUIDs to filter by (order preserved)
+            columns: Columns to load (default: listing columns)
         
         Returns:
             DataFrame: Filtered charts ordered by the provided UUID list
         """
+        if not chart_uuids:
+            return pd.DataFrame()
+        
+        list_columns = DATABASE_CONFIG["chart_list_columns"]
+        if columns is None or set(columns) <= set(list_columns):
+            charts_df = self.catalog.get_charts_by_uuids(chart_uuids)
+            # Charts created since the last catalog refresh are queried directly
+            if len(charts_df) == len(set(chart_uuids)):
+                return charts_df[columns] if columns is not None else charts_df
+        
         try:
-            charts_df = st.session_state.get('charts', pd.DataFrame())
-            if charts_df.empty or not chart_uuids:
-                return pd.DataFrame()
-            
-            # Filter charts that exist in the provided UUIDs
-            filtered_charts = charts_df[charts_df['CHART_UUID'].isin(chart_uuids)]
+            filtered_charts = (self.session.table(DATABASE_CONFIG["chart_table"])
+                              .filter(F.col('CHART_UUID').isin(list(chart_uuids)))
+                              .select(columns or list_columns)
+                              .to_pandas())
             
             if filtered_charts.empty:
                 return pd.DataFrame()
             
             # Create ordering based on the provided chart_uuids list
             # Convert chart_uuids to a categorical with the correct order
-            uuid_order = pd.Categorical(filtered_charts['CHART_UUID'], categories=chart_uuids, ordered=True)
+            uuid_order = pd.Categorical(filtered_charts['CHART_UUID'], categories=list(dict.fromkeys(chart_uuids)), ordered=True)
             filtered_charts = filtered_charts.assign(uuid_order=uuid_order)
             
             # Sort by the categorical order and drop the helper column
             result = filtered_charts.sort_values('uuid_order').drop('uuid_order', axis=1)
             
-            return result
+            return result.reset_index(drop=True)
             
         except Exception as e:
             st.error(f"Failed to filter charts: {str(e)}")
             return pd.DataFrame()
     
-    def get_most_favorited_charts(self, limit: int = None) -> pd.DataFrame:
+    def get_most_favorited_charts(self, limit: int = None, offset: int = 0) -> Tuple[pd.DataFrame, Optional[int]]:
         """
-        Get charts sorted by favorite count.
+        Get a page of favorited charts sorted by favorite count.
         
         Args:
             limit: Maximum number of charts to return
+            offset: Number of charts to skip
         
         Returns:
-            DataFrame: Charts sorted by favorite count
+            Tuple of (charts, next_offset); next_offset is None on the last page
         """
-        try:
-            charts_df = st.session_state.get('charts', pd.DataFrame())
-            favorites_df = st.session_state.get('favorite_charts', pd.DataFrame())
-            
-            if charts_df.empty:
-                return pd.DataFrame()
-            
-            # Count favorites per chart
-            if not favorites_df.empty:
-                favorite_counts = favorites_df.groupby('CHART_UUID').size().reset_index(name='FAVORITE_COUNT')
-                
-                # Merge with charts data
-                charts_with_favorites = charts_df.merge(
-                    favorite_counts, 
-                    on='CHART_UUID', 
-                    how='left'
-                ).fillna({'FAVORITE_COUNT': 0})
-            else:
-                charts_with_favorites = charts_df.copy()
-                charts_with_favorites['FAVORITE_COUNT'] = 0
-            
-            # Sort by favorite count descending, then by creation timestamp descending
-            result = charts_with_favorites.sort_values(
-                ['FAVORITE_COUNT', 'CREATION_TIMESTAMP'], 
-                ascending=[False, False]
-            )
-            
-            chart_limit = limit or UI_CONFIG["charts_per_page"]
-            return result.head(chart_limit)
-            
-        except Exception as e:
-            st.error(f"Failed to get most favorited charts: {str(e)}")
-            return pd.DataFrame()
+        chart_limit = limit or UI_CONFIG["charts_per_page"]
+        page = self._read_gallery(lambda gallery: gallery.most_favorited_page(offset, chart_limit))
+        if page is not None:
+            return page
+        
+        # Read one additional chart to know whether another page exists
+        ranked_charts = self.catalog.favorites.top(chart_limit + 1, offset)
+        next_offset = offset + chart_limit if len(ranked_charts) > chart_limit else None
+        ranked_charts = ranked_charts[:chart_limit]
+        
+        if not ranked_charts:
+            return pd.DataFrame(), None
+        
+        favorite_counts = dict(ranked_charts)
+        charts_df = self.catalog.get_charts_by_uuids(list(favorite_counts))
+        charts_df['FAVORITE_COUNT'] = charts_df['CHART_UUID'].map(favorite_counts)
+        return charts_df, next_offset
     
-    def get_user_favorite_charts(self, user_name: str) -> pd.DataFrame:
+    def get_user_favorite_charts(self, user_name: str, cursor: Optional[Tuple] = None,
+                                 limit: int = None) -> Tuple[pd.DataFrame, Optional[Tuple]]:
         """
-        Get charts favorited by a specific user.
+        Get a page of charts favorited by a specific user.
         
         Args:
             user_name: Name of the user
+            cursor: Cursor returned for the previous page
+            limit: Maximum number of charts to return
         
         Returns:
-            DataFrame: User's favorite charts
+            Tuple of (charts, next_cursor); next_cursor is None on the last page
         """
+        user_favorite_uuids = list(self.catalog.favorites.user_favorites(user_name))
+        
+        if not user_favorite_uuids:
+            return pd.DataFrame(), None
+        
+        chart_limit = limit or UI_CONFIG["charts_per_page"]
+        return self.catalog.get_chart_page(cursor, chart_limit, chart_uuids=user_favorite_uuids)
+    
+    def _read_gallery(self, read_page: Callable[[GalleryViews], Tuple]) -> Optional[Tuple]:
+        """
+        Read a page from the gallery table.
+        
+        The gallery table lags behind the charts and favorites, so while the
+        shared catalog has seen changes the table may not contain yet, pages are
+        served by the catalog instead. After a failure the gallery table is not
+        used by this process until its retry delay has passed.
+        
+        Args:
+            read_page: Function reading the page from the gallery views
+        
+        Returns:
+            The page, or None if the gallery table is disabled, unavailable or older than the catalog
+        """
+        if self.gallery is None or not self.gallery.is_available():
+            return None
+        self.catalog.ensure_fresh()
+        if self.catalog.changed_within(GALLERY_CONFIG["catalog_preferred_seconds"]):
+            return None
         try:
-            charts_df = st.session_state.get('charts', pd.DataFrame())
-            favorites_df = st.session_state.get('favorite_charts', pd.DataFrame())
-            
-            if charts_df.empty or favorites_df.empty:
-                return pd.DataFrame()
-            
-            # Get chart UUIDs favorited by user
-            user_favorite_uuids = favorites_df[
-                favorites_df['USER_NAME'] == user_name
-            ]['CHART_UUID'].tolist()
-            
-            # Filter charts
-            return charts_df[
-                charts_df['CHART_UUID'].isin(user_favorite_uuids)
-            ].sort_values('CREATION_TIMESTAMP', ascending=False)
-            
+            page = read_page(self.gallery)
         except Exception as e:
-            st.error(f"Failed to get user favorite charts: {str(e)}")
-            return pd.DataFrame()
+            self.gallery.record_failure()
+            st.warning(f"Gallery table unavailable, reading charts from the catalog: {str(e)}")
+            return None
+        self.gallery.record_success()
+        return page
     
     def refresh_all_data(self):
-        """Refresh all cached data from the database."""
-        self.session_manager.refresh_data()
-        # Clear the cache for chart data
-        self.get_chart_data.clear() 
\ No newline at end of file
+        """
+        Apply all chart and favorite changes since the last refresh.
+        
+        Only the cached results of charts that changed are invalidated.
+        """
+        self.catalog.refresh() 
\ No newline at end of file
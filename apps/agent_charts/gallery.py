@@ -0,0 +1,120 @@
+"""
+Gallery module for the Agent Charts application.
+Reads chart gallery pages from a dynamic table that Snowflake keeps up to date incrementally.
+"""
+
+import pandas as pd
+import time
+from typing import List, Optional, Tuple
+from snowflake.snowpark import Session
+
+from config import DATABASE_CONFIG
+
+# Columns of the gallery tables returned for chart listings
+GALLERY_COLUMNS = DATABASE_CONFIG["chart_list_columns"] + ["FAVORITE_COUNT"]
+
+# Keyset condition for pages ordered by (CREATION_TIMESTAMP, CHART_UUID) descending
+_KEYSET_FILTER = "(CREATION_TIMESTAMP < ? OR (CREATION_TIMESTAMP = ? AND CHART_UUID < ?))"
+
+
+class GalleryViews:
+    """
+    Gallery pages read from a precomputed dynamic table.
+    
+    The gallery table holds every chart with its favorite count. Every page
+    is a single ORDER BY ... LIMIT query, so page latency does not depend on
+    the number of charts or favorites.
+    
+    After a failed query the gallery table is not used until a retry delay
+    has passed. The delay doubles with every failure up to max_retry_delay_seconds
+    and is reset by the next successful query.
+    """
+    
+    def __init__(self, session: Session, retry_delay_seconds: float, max_retry_delay_seconds: float):
+        self.session = session
+        self.gallery_table = DATABASE_CONFIG["gallery_table"]
+        self.retry_delay_seconds = retry_delay_seconds
+        self.max_retry_delay_seconds = max_retry_delay_seconds
+        self._retry_delay = retry_delay_seconds
+        self._disabled_until = None
+    
+    def is_available(self) -> bool:
+        """Check whether the gallery table may be queried."""
+        return self._disabled_until is None or time.monotonic() >= self._disabled_until
+    
+    def record_success(self):
+        """Reset the retry delay after a successful query."""
+        self._disabled_until = None
+        self._retry_delay = self.retry_delay_seconds
+    
+    def record_failure(self):
+        """Stop using the gallery table for the current retry delay and double the delay."""
+        self._disabled_until = time.monotonic() + self._retry_delay
+        self._retry_delay = min(self._retry_delay * 2, self.max_retry_delay_seconds)
+    
+    def recent_page(self, cursor: Optional[Tuple] = None, limit: int = 20,
+                    user_name: Optional[str] = None) -> Tuple[pd.DataFrame, Optional[Tuple]]:
+        """
+        Get a page of charts ordered from newest to oldest.
+        
+        Args:
+            cursor: (CREATION_TIMESTAMP, CHART_UUID) of the last chart of the previous page
+            limit: Maximum number of charts to return
+            user_name: Only return charts created by this user
+        
+        Returns:
+            Tuple of (charts, next_cursor); next_cursor is None on the last page
+        """
+        filters, params = [], []
+        if user_name is not None:
+            filters.append("USER_NAME = ?")
+            params.append(user_name)
+        return self._keyset_page(self.gallery_table, filters, params, cursor, limit)
+    
+    def most_favorited_page(self, offset: int = 0, limit: int = 20) -> Tuple[pd.DataFrame, Optional[int]]:
+        """
+        Get a page of favorited charts ordered by favorite count, then newest first.
+        
+        Args:
+            offset: Number of charts to skip
+            limit: Maximum number of charts to return
+        
+        Returns:
+            Tuple of (charts, next_offset); next_offset is None on the last page
+        """
+        charts = self._query(
+            self.gallery_table, ["FAVORITE_COUNT > 0"], [],
+            "FAVORITE_COUNT DESC, CREATION_TIMESTAMP DESC, CHART_UUID",
+            limit + 1, offset
+        )
+        next_offset = offset + limit if len(charts) > limit else None
+        return charts.head(limit), next_offset
+    
+    def _keyset_page(self, table: str, filters: List[str], params: List, cursor: Optional[Tuple],
+                     limit: int) -> Tuple[pd.DataFrame, Optional[Tuple]]:
+        """Get a page ordered by (CREATION_TIMESTAMP, CHART_UUID) descending, starting after the cursor."""
+        if cursor is not None:
+            cursor_timestamp = pd.Timestamp(cursor[0]).to_pydatetime()
+            filters = filters + [_KEYSET_FILTER]
+            params = params + [cursor_timestamp, cursor_timestamp, cursor[1]]
+        
+        charts = self._query(table, filters, params, "CREATION_TIMESTAMP DESC, CHART_UUID DESC", limit + 1)
+        if len(charts) <= limit:
+            return charts, None
+        
+        page_df = charts.head(limit)
+        last_chart = page_df.iloc[-1]
+        return page_df, (last_chart['CREATION_TIMESTAMP'], last_chart['CHART_UUID'])
+    
+    def _query(self, table: str, filters: List[str], params: List, order_by: str,
+               limit: int, offset: int = 0) -> pd.DataFrame:
+        """Run a bound-parameter LIMIT query against the gallery table."""
+        where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
+        sql_query = f"""
+SELECT {', '.join(GALLERY_COLUMNS)}
+FROM {table}
+{where_clause}
+ORDER BY {order_by}
+LIMIT {int(limit)} OFFSET {int(offset)}
+"""
+        return self.session.sql(sql_query, params=params).to_pandas()
\ No newline at end of file
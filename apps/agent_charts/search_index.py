@@ -0,0 +1,146 @@
+"""
+Search index module for the Agent Charts application.
+Provides an in-process BM25 index over chart questions used alongside Cortex Search.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase alphanumeric tokens.
+    
+    Underscores and dots separate tokens, so semantic view names like
+    AI_DEVELOPMENT.PUBLIC.FACTORY_DATA_MODEL are searchable by their parts.
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        List of tokens in order of appearance
+    """
+    if not isinstance(text, str):
+        return []
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class ChartSearchIndex:
+    """
+    Inverted index ranking charts with BM25.
+    
+    Each chart is indexed as a single document made of its text fields.
+    Charts can be added and removed one by one, so the index follows the
+    chart catalog without being rebuilt. The index has no database
+    dependencies and works fully offline.
+    """
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._document_lengths: Dict[str, int] = {}
+        self._document_terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+    
+    def __len__(self) -> int:
+        return len(self._document_lengths)
+    
+    def __contains__(self, chart_uuid: str) -> bool:
+        return chart_uuid in self._document_lengths
+    
+    def rebuild(self, documents: Iterable[Tuple[str, str]]):
+        """
+        Replace the indexed charts.
+        
+        Args:
+            documents: (CHART_UUID, text) pairs
+        """
+        with self._lock:
+            self._postings = {}
+            self._document_lengths = {}
+            self._document_terms = {}
+            self._total_length = 0
+            for chart_uuid, text in documents:
+                self._add(chart_uuid, text)
+    
+    def add(self, chart_uuid: str, text: str):
+        """
+        Index a chart, replacing its previous text if it is already indexed.
+        
+        Args:
+            chart_uuid: UUID of the chart
+            text: Text to index
+        """
+        with self._lock:
+            self._remove(chart_uuid)
+            self._add(chart_uuid, text)
+    
+    def remove(self, chart_uuid: str):
+        """
+        Remove a chart from the index.
+        
+        Args:
+            chart_uuid: UUID of the chart
+        """
+        with self._lock:
+            self._remove(chart_uuid)
+    
+    def search(self, query: str, limit: int) -> List[str]:
+        """
+        Rank indexed charts by their BM25 score for a query.
+        
+        Args:
+            query: Search query
+            limit: Maximum number of results
+        
+        Returns:
+            List of chart UUIDs, best match first
+        """
+        query_terms = set(tokenize(query))
+        scores: Dict[str, float] = {}
+        with self._lock:
+            document_count = len(self._document_lengths)
+            if document_count == 0 or not query_terms:
+                return []
+            average_length = self._total_length / document_count
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chart_uuid, term_frequency in postings.items():
+                    length_norm = 1 - self.b + self.b * self._document_lengths[chart_uuid] / average_length
+                    term_score = term_frequency * (self.k1 + 1) / (term_frequency + self.k1 * length_norm)
+                    scores[chart_uuid] = scores.get(chart_uuid, 0.0) + idf * term_score
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [chart_uuid for chart_uuid, _ in ranked[:limit]]
+    
+    def _add(self, chart_uuid: str, text: str):
+        """Add a chart that is not indexed yet. The caller holds the lock."""
+        tokens = tokenize(text)
+        term_frequencies = Counter(tokens)
+        for term, term_frequency in term_frequencies.items():
+            self._postings.setdefault(term, {})[chart_uuid] = term_frequency
+        self._document_terms[chart_uuid] = list(term_frequencies)
+        self._document_lengths[chart_uuid] = len(tokens)
+        self._total_length += len(tokens)
+    
+    def _remove(self, chart_uuid: str):
+        """Remove a chart if it is indexed. The caller holds the lock."""
+        document_length = self._document_lengths.pop(chart_uuid, None)
+        if document_length is None:
+            return
+        self._total_length -= document_length
+        for term in self._document_terms.pop(chart_uuid):
+            postings = self._postings[term]
+            del postings[chart_uuid]
+            if not postings:
+                del self._postings[term]
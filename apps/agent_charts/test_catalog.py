@@ -0,0 +1,112 @@
+"""
+Tests for the chart catalog module of the Agent Charts application.
+Replaces all Snowflake queries of the catalog with in-memory tables.
+"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('snowflake.snowpark')
+pytest.importorskip('snowflake.core')
+pytest.importorskip('dotenv')
+
+from catalog import ChartCatalog
+from config import DATABASE_CONFIG
+
+
+def chart_rows(*chart_uuids):
+    return pd.DataFrame({
+        'CHART_UUID': list(chart_uuids),
+        'CREATION_TIMESTAMP': pd.to_datetime([f'2025-01-0{ix + 1}' for ix in range(len(chart_uuids))]),
+        'USER_NAME': 'user',
+        'QUESTION': [f'question {chart_uuid}' for chart_uuid in chart_uuids],
+        'SEMANTIC_VIEW_NAME': 'view'
+    })
+
+
+def change_rows(rows, change_action, columns):
+    rows = rows.copy()
+    for column in columns:
+        if column not in rows:
+            rows[column] = None
+    rows['CHANGE_ACTION'] = change_action
+    return rows[columns + ['CHANGE_ACTION']]
+
+
+class StubCatalog(ChartCatalog):
+    """Catalog reading charts, favorites and changes from in-memory tables."""
+    
+    def __init__(self, charts, changes):
+        super().__init__(None, refresh_interval_seconds=60, watermark_lookback_seconds=0,
+                         max_full_reload_interval_seconds=300)
+        self.stub_charts = charts
+        self.stub_changes = changes
+    
+    def _current_timestamp(self):
+        return '2025-01-01 00:00:00.000000000 +0000'
+    
+    def _load_charts(self, watermark):
+        return self.stub_charts
+    
+    def _load_favorites(self):
+        return pd.DataFrame(columns=['CHART_UUID', 'USER_NAME'])
+    
+    def _load_changes(self, table_name, columns, changes_until):
+        changes = self.stub_changes.get(table_name)
+        if isinstance(changes, Exception):
+            raise changes
+        if changes is None:
+            return pd.DataFrame(columns=columns + ['CHANGE_ACTION'])
+        return changes
+
+
+def test_snapshot_changes_keep_charts_listed():
+    catalog = StubCatalog(chart_rows('a', 'b'), {})
+    catalog.refresh()
+    notified = []
+    catalog.add_change_listener(lambda chart_uuids, sql_queries: notified.append(sorted(chart_uuids)))
+    
+    chart_columns = DATABASE_CONFIG['chart_list_columns'] + ['SQL_QUERY']
+    catalog.stub_changes = {
+        DATABASE_CONFIG['chart_table']: change_rows(chart_rows('a', 'b', 'c').tail(1), 'INSERT', chart_columns),
+        DATABASE_CONFIG['snapshot_table']: pd.DataFrame({'CHART_UUID': ['a'], 'CHANGE_ACTION': ['INSERT']}),
+    }
+    catalog.refresh()
+    
+    assert catalog.charts['CHART_UUID'].tolist() == ['c', 'b', 'a']
+    assert notified == [['a', 'c']]
+
+
+def test_missing_snapshot_table_does_not_stop_incremental_refresh():
+    catalog = StubCatalog(chart_rows('a'), {})
+    catalog.refresh()
+    
+    chart_columns = DATABASE_CONFIG['chart_list_columns'] + ['SQL_QUERY']
+    catalog.stub_changes = {
+        DATABASE_CONFIG['chart_table']: change_rows(chart_rows('a', 'b').tail(1), 'INSERT', chart_columns),
+        DATABASE_CONFIG['snapshot_table']: RuntimeError('Object does not exist'),
+    }
+    catalog.stub_charts = chart_rows('a')
+    catalog.refresh()
+    
+    assert catalog.charts['CHART_UUID'].tolist() == ['b', 'a']
+    assert catalog._changes_available
+
+
+def test_catalog_changes_are_tracked():
+    catalog = StubCatalog(chart_rows('a'), {})
+    catalog.refresh()
+    
+    assert not catalog.changed_within(60)
+    
+    catalog.stub_changes = {
+        DATABASE_CONFIG['snapshot_table']: pd.DataFrame({'CHART_UUID': ['a'], 'CHANGE_ACTION': ['INSERT']}),
+    }
+    catalog.refresh()
+    
+    assert not catalog.changed_within(60)
+    
+    catalog.add_favorite('a', 'user')
+    
+    assert catalog.changed_within(60)
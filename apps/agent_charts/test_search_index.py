@@ -0,0 +1,59 @@
+"""
+Tests for the search index module of the Agent Charts application.
+Runs fully offline against the in-process BM25 index.
+"""
+
+from apps.agent_charts.search_index import ChartSearchIndex, tokenize
+
+
+def build_index():
+    index = ChartSearchIndex()
+    index.rebuild([
+        ("chart-1", "Monthly sales trend by region AI_DEVELOPMENT.PUBLIC.SALES_MODEL"),
+        ("chart-2", "Sales of bottles per production line"),
+        ("chart-3", "Machine downtime per shift AI_DEVELOPMENT.PUBLIC.FACTORY_DATA_MODEL"),
+    ])
+    return index
+
+
+def test_tokenize_splits_semantic_view_names():
+    assert tokenize("AI_DEVELOPMENT.PUBLIC.Factory_Data_Model") == ["ai", "development", "public", "factory", "data", "model"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_best_match_first():
+    index = build_index()
+    
+    assert index.search("sales trend", limit=10) == ["chart-1", "chart-2"]
+    assert index.search("downtime", limit=10) == ["chart-3"]
+    assert index.search("factory data model", limit=1) == ["chart-3"]
+
+
+def test_search_without_matches_returns_nothing():
+    index = build_index()
+    
+    assert index.search("weather forecast", limit=10) == []
+    assert index.search("", limit=10) == []
+    assert ChartSearchIndex().search("sales", limit=10) == []
+
+
+def test_add_replaces_indexed_text():
+    index = build_index()
+    
+    index.add("chart-2", "Machine downtime and energy usage")
+    
+    assert len(index) == 3
+    assert index.search("bottles", limit=10) == []
+    assert set(index.search("downtime", limit=10)) == {"chart-2", "chart-3"}
+
+
+def test_remove_drops_chart_from_results():
+    index = build_index()
+    
+    index.remove("chart-1")
+    index.remove("unknown-chart")
+    
+    assert "chart-1" not in index
+    assert len(index) == 2
+    assert index.search("sales", limit=10) == ["chart-2"]
+    assert index.search("trend", limit=10) == []
@@ -125,6 +125,41 @@ def create_action_buttons(page: str, chart_uuid: str, is_favorite: bool) -> tupl
     return details_clicked, favorite_clicked
 
 
+def create_pagination_buttons(page: str, has_previous: bool, has_next: bool) -> tuple[bool, bool]:
+    """
+    Create buttons to navigate to the previous and next page of charts.
+    
+    Args:
+        page: Current page identifier
+        has_previous: Whether a previous page exists
+        has_next: Whether a next page exists
+    
+    Returns:
+        tuple: (previous_clicked, next_clicked)
+    """
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        previous_clicked = st.button(
+            "⬅️ Previous", 
+            key=f"{page}_previous_page", 
+            use_container_width=True, 
+            type="secondary",
+            disabled=not has_previous
+        )
+    
+    with col2:
+        next_clicked = st.button(
+            "Next ➡️", 
+            key=f"{page}_next_page", 
+            use_container_width=True, 
+            type="secondary",
+            disabled=not has_next
+        )
+    
+    return previous_clicked, next_clicked
+
+
 def display_expandable_section(title: str, content, content_type: str = "text", expanded: bool = False):
     """
     Display content in an expandable section.
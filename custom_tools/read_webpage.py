@@ -1,10 +1,229 @@
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 import re
+import threading
+import time
 
-def read_webpage(url: str) -> str:
-    response = requests.get(url)
-    webpage_text = BeautifulSoup(response.text).get_text()
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+CONNECT_TIMEOUT_SECONDS = 5
+READ_TIMEOUT_SECONDS = 15
+TOTAL_TIMEOUT_SECONDS = 30
+MAX_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 128
+MAX_WORKERS = 16
+MAX_CONNECTIONS_PER_HOST = 4
+
+# Elements that never contain readable text
+NON_TEXT_TAGS = ['script', 'style', 'noscript', 'template', 'svg']
+
+# Session and cache live as long as the Python process, so they are shared between calls
+_session = None
+_session_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Get the pooled HTTP session shared by all calls.
+    
+    Returns:
+        requests.Session: Session reusing connections per host
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_CONNECTIONS_PER_HOST, max_retries=1)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+def get_host_semaphore(url: str) -> threading.Semaphore:
+    """
+    Get the semaphore limiting concurrent requests to the host of a URL.
+    
+    Args:
+        url (str): URL of the webpage
+    
+    Returns:
+        threading.Semaphore: Semaphore with MAX_CONNECTIONS_PER_HOST slots
+    """
+    host = urlsplit(url).netloc.lower()
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+        return _host_semaphores[host]
+
+
+def download(url: str, headers: dict) -> tuple:
+    """
+    Download a webpage with timeouts and a maximum number of bytes.
+    
+    Args:
+        url (str): URL of the webpage
+        headers (dict): Additional request headers
+    
+    Returns:
+        tuple: (response, content, truncated) where content is None for 304 Not Modified
+    """
+    deadline = time.monotonic() + TOTAL_TIMEOUT_SECONDS
+    with get_host_semaphore(url), get_session().get(
+        url,
+        headers=headers,
+        timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS),
+        stream=True
+    ) as response:
+        if response.status_code == 304:
+            return response, None, False
+        
+        content = bytearray()
+        truncated = False
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            content += chunk
+            if len(content) >= MAX_BYTES or time.monotonic() > deadline:
+                truncated = True
+                break
+        return response, bytes(content[:MAX_BYTES]), truncated
+
+
+def extract_text(content: bytes, encoding: str = None) -> str:
+    """
+    Extract the readable text of an HTML document.
+    
+    Args:
+        content (bytes): HTML document
+        encoding (str): Encoding from the response headers, detected from the document if None
+    
+    Returns:
+        str: Text content with collapsed empty lines
+    """
+    soup = BeautifulSoup(content, HTML_PARSER, from_encoding=encoding)
+    for element in soup(NON_TEXT_TAGS):
+        element.decompose()
+    webpage_text = soup.get_text()
     # Remove multiple empty lines
-    webpage_text = re.sub(r'\n\s*\n', '\n\n', webpage_text)
-    return webpage_text
\ No newline at end of file
+    return re.sub(r'\n\s*\n', '\n\n', webpage_text)
+
+
+def fetch_webpage(url: str) -> dict:
+    """
+    Read a webpage and return its text content together with status and timing.
+    
+    Pages are cached for CACHE_TTL_SECONDS. Expired pages are revalidated with
+    their ETag or Last-Modified header and only downloaded again if they changed.
+    
+    Args:
+        url (str): URL of the webpage
+    
+    Returns:
+        dict: TEXT, STATUS_CODE (None if the request failed), CACHED, TRUNCATED, ELAPSED_MS and ERROR
+    """
+    start = time.monotonic()
+    result = {'TEXT': None, 'STATUS_CODE': None, 'CACHED': False, 'TRUNCATED': False, 'ELAPSED_MS': 0, 'ERROR': None}
+    
+    with _cache_lock:
+        cached = _cache.get(url)
+        if cached is not None:
+            _cache.move_to_end(url)
+    if cached is not None and start - cached['fetched_at'] < CACHE_TTL_SECONDS:
+        result.update(TEXT=cached['text'], STATUS_CODE=200, CACHED=True)
+        return result
+    
+    headers = {}
+    if cached is not None:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+    
+    try:
+        response, content, truncated = download(url, headers)
+    except requests.exceptions.Timeout:
+        result.update(TEXT=f'Reading {url} timed out.', ERROR='timeout', ELAPSED_MS=int((time.monotonic() - start) * 1000))
+        return result
+    except requests.exceptions.RequestException as e:
+        result.update(TEXT=f'Reading {url} failed: {str(e)}', ERROR=str(e), ELAPSED_MS=int((time.monotonic() - start) * 1000))
+        return result
+    
+    if content is None:
+        webpage_text = cached['text']
+    else:
+        encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+        webpage_text = extract_text(content, encoding)
+        if truncated:
+            webpage_text += f'\n\n[Content truncated after {len(content)} bytes]'
+    result.update(
+        TEXT=webpage_text,
+        STATUS_CODE=response.status_code,
+        CACHED=content is None,
+        TRUNCATED=truncated,
+        ELAPSED_MS=int((time.monotonic() - start) * 1000)
+    )
+    if response.status_code not in (200, 304):
+        return result
+    
+    with _cache_lock:
+        _cache[url] = {
+            'fetched_at': time.monotonic(),
+            'etag': response.headers.get('ETag') or (cached['etag'] if content is None else None),
+            'last_modified': response.headers.get('Last-Modified') or (cached['last_modified'] if content is None else None),
+            'text': webpage_text
+        }
+        _cache.move_to_end(url)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return result
+
+
+def read_webpage(url: str) -> str:
+    """
+    Read a webpage and return its text content.
+    
+    Args:
+        url (str): URL of the webpage
+    
+    Returns:
+        str: Text content of the webpage
+    """
+    return fetch_webpage(url)['TEXT']
+
+
+def read_webpages(df: pd.DataFrame) -> pd.Series:
+    """
+    Read a batch of webpages concurrently (vectorized UDF handler).
+    
+    URLs are fetched on a thread pool with at most MAX_CONNECTIONS_PER_HOST
+    concurrent requests per host. Duplicate URLs in a batch are fetched once.
+    
+    Args:
+        df (pd.DataFrame): Batch with the URLs in the first column
+    
+    Returns:
+        pd.Series: One fetch_webpage result per URL, in the order of the batch
+    """
+    urls = df.iloc[:, 0]
+    unique_urls = [url for url in urls.dropna().unique()]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = dict(zip(unique_urls, executor.map(fetch_webpage, unique_urls)))
+    return pd.Series([results.get(url) for url in urls], index=df.index)
+
+
+# Snowflake calls read_webpages with batches of rows instead of once per row
+read_webpages._sf_vectorized_input = pd.DataFrame
+read_webpages._sf_max_batch_size = 100
\ No newline at end of file
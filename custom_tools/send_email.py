@@ -1,26 +1,187 @@
 from snowflake.snowpark import Session
+from typing import Callable, List
+import json
+import time
+import uuid
 
-def send_email(session: Session, recipient: str, subject: str, text: str) -> str:
+OUTBOX_TABLE = 'AI_DEVELOPMENT.PUBLIC.EMAIL_OUTBOX'
+OUTBOX_STREAM = 'AI_DEVELOPMENT.PUBLIC.EMAIL_OUTBOX_STREAM'
+MAX_ATTEMPTS = 3
+MAX_RECIPIENTS_PER_EMAIL = 50
+
+# Bound parameter holding a JSON array of message ids
+MESSAGE_IDS_FILTER = 'MESSAGE_ID IN (SELECT VALUE::TEXT FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?))))'
+
+
+def snowflake_transport(session: Session, recipients: List[str], subject: str, text: str):
     """
     Sends an email using Snowflake's email functionality.
     
     Args:
         session (Session): Active Snowflake Snowpark session
-        recipient (str): Email address of the recipient
+        recipients (List[str]): Email addresses of the recipients
         subject (str): Subject line of the email
         text (str): Body content of the email (will be sent as HTML)
-    
-    Returns:
-        str: Confirmation message indicating email was sent
     """
     session.call(
         'SYSTEM$SEND_EMAIL',
         'ai_email_int',
-        recipient,
+        ','.join(recipients),
         subject,
         text,
         'text/html'
     )
+
+
+def send_email(session: Session, recipient: str, subject: str, text: str) -> str:
+    """
+    Queues an email in the outbox table. The DRAIN_EMAIL_OUTBOX task sends it.
+    
+    All recipients of one call share a BATCH_ID and are sent one email together.
+    
+    Args:
+        session (Session): Active Snowflake Snowpark session
+        recipient (str): Email address of the recipient, or several separated by commas
+        subject (str): Subject line of the email
+        text (str): Body content of the email (will be sent as HTML)
+    
+    Returns:
+        str: Confirmation message indicating email was queued
+    """
+    recipients = [address.strip() for address in recipient.split(',') if address.strip()]
+    batch_id = str(uuid.uuid4())
+    message_ids = [str(uuid.uuid4()) for _ in recipients]
+    session.sql(
+        f"""
+INSERT INTO {OUTBOX_TABLE} (MESSAGE_ID, BATCH_ID, CREATED_AT, RECIPIENT, SUBJECT, BODY, STATUS, ATTEMPTS)
+SELECT VALUE:MESSAGE_ID::TEXT, ?, CURRENT_TIMESTAMP(), VALUE:RECIPIENT::TEXT, ?, ?, 'QUEUED', 0
+FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?)))
+""",
+        params=[batch_id, subject, text, json.dumps([
+            {'MESSAGE_ID': message_id, 'RECIPIENT': address}
+            for message_id, address in zip(message_ids, recipients)
+        ])]
+    ).collect()
     
     # Return a confirmation message
-    return f'Email was sent to {recipient} with subject: "{subject}".'
\ No newline at end of file
+    return f'Email to {recipient} with subject: "{subject}" was queued and will be sent within a minute.'
+
+
+def send_messages(session: Session, messages: List, subject: str, body: str,
+                  transport: Callable[[Session, List[str], str, str], None]) -> str:
+    """
+    Sends one email to the recipients of messages and records the send time and latency.
+    
+    Args:
+        session (Session): Active Snowflake Snowpark session
+        messages (List): Outbox rows with MESSAGE_ID and RECIPIENT
+        subject (str): Subject line of the email
+        body (str): Body content of the email
+        transport (Callable): Function sending one email to a list of recipients
+    
+    Returns:
+        str: Error message if sending failed, otherwise None
+    """
+    send_start = time.monotonic()
+    try:
+        transport(session, [message['RECIPIENT'] for message in messages], subject, body)
+    except Exception as e:
+        return str(e)
+    session.sql(
+        f"""
+UPDATE {OUTBOX_TABLE}
+SET ATTEMPTS = ATTEMPTS + 1,
+    STATUS = 'SENT',
+    SENT_AT = CURRENT_TIMESTAMP(),
+    LATENCY_MS = DATEDIFF(MILLISECOND, CREATED_AT, CURRENT_TIMESTAMP()),
+    SEND_DURATION_MS = ?,
+    ERROR = NULL
+WHERE {MESSAGE_IDS_FILTER}
+""",
+        params=[int((time.monotonic() - send_start) * 1000), json.dumps([message['MESSAGE_ID'] for message in messages])]
+    ).collect()
+    return None
+
+
+def record_failure(session: Session, messages: List, error: str):
+    """
+    Queues failed messages again, or marks them as failed after MAX_ATTEMPTS.
+    
+    Args:
+        session (Session): Active Snowflake Snowpark session
+        messages (List): Outbox rows with MESSAGE_ID
+        error (str): Error message of the failed send
+    """
+    session.sql(
+        f"""
+UPDATE {OUTBOX_TABLE}
+SET ATTEMPTS = ATTEMPTS + 1,
+    STATUS = IFF(ATTEMPTS + 1 >= {MAX_ATTEMPTS}, 'FAILED', 'QUEUED'),
+    ERROR = ?
+WHERE {MESSAGE_IDS_FILTER}
+""",
+        params=[error, json.dumps([message['MESSAGE_ID'] for message in messages])]
+    ).collect()
+
+
+def drain_outbox(session: Session, batch_size: int = 100,
+                 transport: Callable[[Session, List[str], str, str], None] = snowflake_transport) -> str:
+    """
+    Sends queued emails from the outbox table.
+    
+    Messages queued by the same send_email call (same BATCH_ID) are sent as
+    one email to all of their recipients. If that email fails, every
+    recipient is sent a separate email, so one invalid address does not fail
+    the others. Failed messages are queued again until MAX_ATTEMPTS.
+    Status, attempts, send time, latency and errors are recorded per message.
+    
+    Args:
+        session (Session): Active Snowflake Snowpark session
+        batch_size (int): Maximum number of messages to send
+        transport (Callable): Function sending one email to a list of recipients
+    
+    Returns:
+        str: Number of sent and failed messages
+    """
+    # Consume the stream that triggers the DRAIN_EMAIL_OUTBOX task. Messages queued
+    # from now on stay in the stream and trigger the next run.
+    session.sql(
+        f"INSERT INTO {OUTBOX_TABLE} (MESSAGE_ID) SELECT MESSAGE_ID FROM {OUTBOX_STREAM} WHERE FALSE"
+    ).collect()
+    
+    messages = session.sql(
+        f"""
+SELECT MESSAGE_ID, BATCH_ID, RECIPIENT, SUBJECT, BODY
+FROM {OUTBOX_TABLE}
+WHERE STATUS = 'QUEUED'
+ORDER BY CREATED_AT
+LIMIT {int(batch_size)}
+"""
+    ).collect()
+    
+    batches = {}
+    for message in messages:
+        batches.setdefault(message['BATCH_ID'] or message['MESSAGE_ID'], []).append(message)
+    
+    sent, failed = 0, 0
+    for batch_messages in batches.values():
+        subject, body = batch_messages[0]['SUBJECT'], batch_messages[0]['BODY']
+        for start in range(0, len(batch_messages), MAX_RECIPIENTS_PER_EMAIL):
+            chunk = batch_messages[start:start + MAX_RECIPIENTS_PER_EMAIL]
+            error = send_messages(session, chunk, subject, body, transport)
+            if error is None:
+                sent += len(chunk)
+                continue
+            if len(chunk) == 1:
+                record_failure(session, chunk, error)
+                failed += 1
+                continue
+            for message in chunk:
+                error = send_messages(session, [message], subject, body, transport)
+                if error is None:
+                    sent += 1
+                else:
+                    record_failure(session, [message], error)
+                    failed += 1
+    
+    return f'Sent {sent} and failed {failed} of {len(messages)} queued messages.'
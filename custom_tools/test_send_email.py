@@ -0,0 +1,102 @@
+"""
+Tests for the email outbox of the custom tools.
+Drains the outbox with a fake transport and a stub session, so no emails are sent.
+"""
+
+import json
+import pytest
+
+pytest.importorskip('snowflake.snowpark')
+
+from send_email import MAX_RECIPIENTS_PER_EMAIL, drain_outbox
+
+
+class StubResult:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def collect(self):
+        return self.rows
+
+
+class StubSession:
+    """Session returning the given queued messages and recording the message ids of every update."""
+    
+    def __init__(self, messages):
+        self.messages = messages
+        self.sent_ids = []
+        self.failed_ids = []
+    
+    def sql(self, query, params=None):
+        if query.lstrip().startswith('SELECT MESSAGE_ID'):
+            return StubResult(self.messages)
+        if "STATUS = 'SENT'" in query:
+            self.sent_ids.extend(json.loads(params[-1]))
+        elif 'ERROR = ?' in query:
+            self.failed_ids.extend(json.loads(params[-1]))
+        return StubResult([])
+
+
+class FakeTransport:
+    """Transport recording every email and failing for some addresses."""
+    
+    def __init__(self, invalid_addresses=()):
+        self.invalid_addresses = set(invalid_addresses)
+        self.emails = []
+    
+    def __call__(self, session, recipients, subject, text):
+        if self.invalid_addresses & set(recipients):
+            raise RuntimeError('invalid address')
+        self.emails.append((sorted(recipients), subject))
+
+
+def message(message_id, batch_id, recipient, subject='Report'):
+    return {'MESSAGE_ID': message_id, 'BATCH_ID': batch_id, 'RECIPIENT': recipient,
+            'SUBJECT': subject, 'BODY': '<p>Hello</p>'}
+
+
+def test_messages_of_different_calls_are_not_coalesced():
+    session = StubSession([
+        message('m1', 'b1', 'alice@example.com'),
+        message('m2', 'b1', 'bob@example.com'),
+        message('m3', 'b2', 'carol@example.com'),
+    ])
+    transport = FakeTransport()
+    
+    result = drain_outbox(session, transport=transport)
+    
+    assert transport.emails == [
+        (['alice@example.com', 'bob@example.com'], 'Report'),
+        (['carol@example.com'], 'Report'),
+    ]
+    assert sorted(session.sent_ids) == ['m1', 'm2', 'm3']
+    assert session.failed_ids == []
+    assert result == 'Sent 3 and failed 0 of 3 queued messages.'
+
+
+def test_invalid_address_only_fails_its_own_message():
+    session = StubSession([
+        message('m1', 'b1', 'alice@example.com'),
+        message('m2', 'b1', 'invalid'),
+        message('m3', 'b1', 'carol@example.com'),
+    ])
+    transport = FakeTransport(invalid_addresses=['invalid'])
+    
+    result = drain_outbox(session, transport=transport)
+    
+    assert transport.emails == [(['alice@example.com'], 'Report'), (['carol@example.com'], 'Report')]
+    assert sorted(session.sent_ids) == ['m1', 'm3']
+    assert session.failed_ids == ['m2']
+    assert result == 'Sent 2 and failed 1 of 3 queued messages.'
+
+
+def test_large_batches_are_split():
+    session = StubSession([
+        message(f'm{ix}', 'b1', f'user{ix}@example.com') for ix in range(MAX_RECIPIENTS_PER_EMAIL + 1)
+    ])
+    transport = FakeTransport()
+    
+    drain_outbox(session, transport=transport)
+    
+    assert [len(recipients) for recipients, _ in transport.emails] == [MAX_RECIPIENTS_PER_EMAIL, 1]
+    assert len(session.sent_ids) == MAX_RECIPIENTS_PER_EMAIL + 1
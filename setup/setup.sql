@@ -48,6 +48,9 @@ GRANT ALL ON WAREHOUSE AI_WH TO ROLE AI_ENGINEER;
 GRANT USAGE ON INTEGRATION ai_external_access_integration TO ROLE AI_ENGINEER;
 GRANT USAGE ON INTEGRATION ai_email_int TO ROLE AI_ENGINEER;
 
+-- Grant privilege to run tasks
+GRANT EXECUTE TASK ON ACCOUNT TO ROLE AI_ENGINEER;
+
 -- Grant privilege to use Cortex Functions
 GRANT DATABASE ROLE SNOWFLAKE.CORTEX_USER TO ROLE AI_ENGINEER;
 
@@ -1,7 +1,30 @@
 USE ROLE ACCOUNTADMIN;
 USE SCHEMA AI_DEVELOPMENT.PUBLIC;
 
--- Procedure to send an email
+-- Outbox for emails, drained by the DRAIN_EMAIL_OUTBOX task
+CREATE TABLE IF NOT EXISTS EMAIL_OUTBOX (
+    MESSAGE_ID TEXT,
+    BATCH_ID TEXT,
+    CREATED_AT TIMESTAMP,
+    RECIPIENT TEXT,
+    SUBJECT TEXT,
+    BODY TEXT,
+    STATUS TEXT,
+    ATTEMPTS NUMBER,
+    SENT_AT TIMESTAMP,
+    LATENCY_MS NUMBER,
+    SEND_DURATION_MS NUMBER,
+    ERROR TEXT
+);
+
+ALTER TABLE EMAIL_OUTBOX ADD COLUMN IF NOT EXISTS BATCH_ID TEXT;
+
+GRANT SELECT ON TABLE EMAIL_OUTBOX TO ROLE AI_ENGINEER;
+
+-- Changes of the outbox, so the DRAIN_EMAIL_OUTBOX task only runs when emails are queued or re-queued
+CREATE STREAM IF NOT EXISTS EMAIL_OUTBOX_STREAM ON TABLE EMAIL_OUTBOX;
+
+-- Procedure to send an email (queues the email in the outbox and returns immediately)
 CREATE OR REPLACE PROCEDURE send_mail(recipient TEXT, subject TEXT, text TEXT)
 RETURNS TEXT
 LANGUAGE PYTHON
@@ -12,19 +35,51 @@ HANDLER = 'send_email.send_email';
 
 GRANT USAGE ON PROCEDURE send_mail(TEXT, TEXT, TEXT) TO ROLE AI_ENGINEER;
 
+-- Procedure to send queued emails in batches, one email per send_mail call
+CREATE OR REPLACE PROCEDURE drain_email_outbox(batch_size NUMBER)
+RETURNS TEXT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+IMPORTS = ('@CUSTOM_TOOLS/send_email.py')
+HANDLER = 'send_email.drain_outbox';
+
+CREATE OR REPLACE TASK DRAIN_EMAIL_OUTBOX
+    SCHEDULE = '1 MINUTE'
+    USER_TASK_MANAGED_INITIAL_WAREHOUSE_SIZE = 'XSMALL'
+    WHEN SYSTEM$STREAM_HAS_DATA('EMAIL_OUTBOX_STREAM')
+    AS
+    CALL drain_email_outbox(100);
+
+ALTER TASK DRAIN_EMAIL_OUTBOX RESUME;
+
 -- Procedure to read a webpage and return its text content
 CREATE OR REPLACE FUNCTION read_webpage(url TEXT)
 RETURNS TEXT
 LANGUAGE PYTHON
 RUNTIME_VERSION = '3.11'
-PACKAGES = ('requests', 'beautifulsoup4')
+PACKAGES = ('requests', 'beautifulsoup4', 'lxml', 'pandas')
 IMPORTS = ('@CUSTOM_TOOLS/read_webpage.py')
 EXTERNAL_ACCESS_INTEGRATIONS = (ai_external_access_integration)
 HANDLER = 'read_webpage.read_webpage';
 
 GRANT USAGE ON FUNCTION read_webpage(TEXT) TO ROLE AI_ENGINEER;
 
+-- Vectorized function to read many webpages concurrently, e.g. SELECT URL, read_webpages(URL):TEXT::TEXT FROM URLS
+-- Returns TEXT, STATUS_CODE, CACHED, TRUNCATED, ELAPSED_MS and ERROR per URL
+CREATE OR REPLACE FUNCTION read_webpages(url TEXT)
+RETURNS OBJECT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('requests', 'beautifulsoup4', 'lxml', 'pandas')
+IMPORTS = ('@CUSTOM_TOOLS/read_webpage.py')
+EXTERNAL_ACCESS_INTEGRATIONS = (ai_external_access_integration)
+HANDLER = 'read_webpage.read_webpages';
+
+GRANT USAGE ON FUNCTION read_webpages(TEXT) TO ROLE AI_ENGINEER;
+
 -- Tables, procedures and search services for the Chart App 
+-- Change tracking lets the Chart App refresh incrementally using the CHANGES clause
 CREATE OR REPLACE TABLE AGENT_GENERATED_CHARTS (
     CHART_UUID VARCHAR(134217728),
     CREATION_TIMESTAMP TIMESTAMP,
@@ -33,7 +88,8 @@ CREATE OR REPLACE TABLE AGENT_GENERATED_CHARTS (
     SQL_QUERY VARCHAR,
     CHART_SPEC TEXT,
     SEMANTIC_VIEW_NAME TEXT
-);
+)
+CHANGE_TRACKING = TRUE;
 
 GRANT INSERT, SELECT ON TABLE AGENT_GENERATED_CHARTS TO ROLE AI_ENGINEER;
 
@@ -58,12 +114,142 @@ $$;
 
 GRANT USAGE ON PROCEDURE save_chart(TEXT, TEXT, TEXT, TEXT) TO ROLE AI_ENGINEER;
 
+-- Optional result snapshots so the Chart App can render charts without re-running their SQL
+CREATE OR REPLACE TABLE AGENT_GENERATED_CHARTS_SNAPSHOTS (
+    CHART_UUID VARCHAR(134217728),
+    SNAPSHOT_TIMESTAMP TIMESTAMP,
+    ROW_COUNT NUMBER,
+    CHART_COLUMNS ARRAY,
+    CHART_DATA VARIANT
+)
+CHANGE_TRACKING = TRUE;
+
+GRANT INSERT, SELECT, UPDATE, DELETE ON TABLE AGENT_GENERATED_CHARTS_SNAPSHOTS TO ROLE AI_ENGINEER;
+
+CREATE OR REPLACE PROCEDURE save_chart_snapshot(chart_uuid TEXT)
+RETURNS TEXT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'save_chart_snapshot'
+EXECUTE AS CALLER
+AS
+$$
+import json
+
+# Larger results are not snapshotted and are queried live by the Chart App.
+# The size limit (JSON characters) keeps snapshots below the maximum size of a VARIANT value.
+MAX_SNAPSHOT_ROWS = 100000
+MAX_SNAPSHOT_BYTES = 8 * 1024 * 1024
+
+def column_name(name: str) -> str:
+    """Returns a column name as used for the keys of OBJECT_CONSTRUCT."""
+    if len(name) > 1 and name.startswith('"') and name.endswith('"'):
+        return name[1:-1].replace('""', '"')
+    return name
+
+def save_chart_snapshot(session, chart_uuid: str) -> str:
+    charts = session.sql(
+        'SELECT SQL_QUERY FROM AGENT_GENERATED_CHARTS WHERE CHART_UUID = ?',
+        params=[chart_uuid]
+    ).collect()
+    if len(charts) == 0:
+        return f'Chart {chart_uuid} not found in table AGENT_GENERATED_CHARTS.'
+
+    sql_query = charts[0]['SQL_QUERY'].strip().rstrip(';')
+    # OBJECT_CONSTRUCT does not keep the column order, so the columns are stored separately
+    chart_columns = json.dumps([column_name(name) for name in session.sql(sql_query).schema.names])
+    # Rows are numbered before the LIMIT, so the snapshot keeps the order of the chart query
+    sql_statement = f"""
+MERGE INTO AGENT_GENERATED_CHARTS_SNAPSHOTS AS snapshots
+USING (
+  SELECT ? AS CHART_UUID, COUNT(*) AS ROW_COUNT,
+         ARRAY_AGG(ROW_DATA) WITHIN GROUP (ORDER BY SNAPSHOT_ROW) AS CHART_DATA
+  FROM (
+    SELECT ROW_NUMBER() OVER (ORDER BY NULL) AS SNAPSHOT_ROW, OBJECT_CONSTRUCT_KEEP_NULL(*) AS ROW_DATA
+    FROM ({sql_query})
+    LIMIT {MAX_SNAPSHOT_ROWS + 1}
+  )
+  HAVING COUNT(*) <= {MAX_SNAPSHOT_ROWS}
+     AND COALESCE(SUM(LENGTH(TO_JSON(ROW_DATA))), 0) <= {MAX_SNAPSHOT_BYTES}
+) AS new_snapshot
+ON snapshots.CHART_UUID = new_snapshot.CHART_UUID
+WHEN MATCHED THEN
+  UPDATE SET SNAPSHOT_TIMESTAMP = CURRENT_TIMESTAMP(), ROW_COUNT = new_snapshot.ROW_COUNT,
+             CHART_COLUMNS = PARSE_JSON(?), CHART_DATA = new_snapshot.CHART_DATA
+WHEN NOT MATCHED THEN
+  INSERT VALUES (new_snapshot.CHART_UUID, CURRENT_TIMESTAMP(), new_snapshot.ROW_COUNT, PARSE_JSON(?), new_snapshot.CHART_DATA)
+"""
+    try:
+        merge_result = session.sql(sql_statement, params=[chart_uuid, chart_columns, chart_columns]).collect()
+        error = None if sum(merge_result[0]) > 0 else f'returns more than {MAX_SNAPSHOT_ROWS} rows or {MAX_SNAPSHOT_BYTES} bytes'
+    except Exception as e:
+        # Results above the maximum VARIANT size fail while they are aggregated
+        error = f'could not be snapshotted ({str(e)})'
+    if error is not None:
+        # Drop outdated snapshots so the result is queried live instead
+        session.sql(
+            'DELETE FROM AGENT_GENERATED_CHARTS_SNAPSHOTS WHERE CHART_UUID = ?',
+            params=[chart_uuid]
+        ).collect()
+        return f'Chart {chart_uuid} {error}. No snapshot was saved.'
+    return f'Successfully saved snapshot for chart {chart_uuid} in table AGENT_GENERATED_CHARTS_SNAPSHOTS.'
+$$;
+
+GRANT USAGE ON PROCEDURE save_chart_snapshot(TEXT) TO ROLE AI_ENGINEER;
+
+-- Same as save_chart, but also stores a result snapshot of the chart
+CREATE OR REPLACE PROCEDURE save_chart_with_snapshot(question TEXT, sql_query TEXT, chart_spec TEXT, SEMANTIC_VIEW_NAME TEXT)
+RETURNS TEXT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'save_chart_with_snapshot'
+EXECUTE AS CALLER
+AS
+$$
+import uuid
+
+def save_chart_with_snapshot(session, question: str, sql_query: str, chart_spec: str, semantic_view_name: str) -> str:
+    chart_uuid = str(uuid.uuid4())
+    sql_statement = """
+INSERT INTO AGENT_GENERATED_CHARTS
+SELECT ?, CURRENT_TIMESTAMP(), CURRENT_USER(), ?, ?, ?, ?
+"""
+
+    session.sql(sql_statement, params=[chart_uuid, question, sql_query, chart_spec, semantic_view_name]).collect()
+    snapshot_response = session.call('save_chart_snapshot', chart_uuid)
+    return f'Successfully saved chart in table AGENT_GENERATED_CHARTS. {snapshot_response}'
+$$;
+
+GRANT USAGE ON PROCEDURE save_chart_with_snapshot(TEXT, TEXT, TEXT, TEXT) TO ROLE AI_ENGINEER;
+
 CREATE OR REPLACE TABLE AGENT_GENERATED_CHARTS_FAVORITES (
     CHART_UUID VARCHAR(134217728),
     USER_NAME VARCHAR(134217728)
-);
+)
+CHANGE_TRACKING = TRUE;
 GRANT INSERT, SELECT, DELETE ON TABLE AGENT_GENERATED_CHARTS_FAVORITES TO ROLE AI_ENGINEER;
 
+-- Precomputed gallery pages for the Chart App, refreshed incrementally by Snowflake
+-- Every chart with its favorite count (recent, most favorited and per-user creation pages).
+-- Favorites of a user are read from the Chart App catalog, which includes unwritten changes.
+CREATE OR REPLACE DYNAMIC TABLE AGENT_GENERATED_CHARTS_GALLERY
+  TARGET_LAG = '1 minute'
+  WAREHOUSE = AI_WH
+  REFRESH_MODE = INCREMENTAL
+  CLUSTER BY (CREATION_TIMESTAMP)
+  AS
+    SELECT
+        c.CHART_UUID, c.CREATION_TIMESTAMP, c.USER_NAME, c.QUESTION, c.SEMANTIC_VIEW_NAME,
+        COUNT(DISTINCT f.USER_NAME) AS FAVORITE_COUNT
+    FROM AI_DEVELOPMENT.PUBLIC.AGENT_GENERATED_CHARTS c
+    LEFT JOIN AI_DEVELOPMENT.PUBLIC.AGENT_GENERATED_CHARTS_FAVORITES f
+        ON c.CHART_UUID = f.CHART_UUID
+    GROUP BY c.CHART_UUID, c.CREATION_TIMESTAMP, c.USER_NAME, c.QUESTION, c.SEMANTIC_VIEW_NAME;
+
+GRANT SELECT ON DYNAMIC TABLE AGENT_GENERATED_CHARTS_GALLERY TO ROLE AI_ENGINEER;
+
 CREATE OR REPLACE CORTEX SEARCH SERVICE chart_search_service
   ON QUESTION
   ATTRIBUTES CHART_UUID
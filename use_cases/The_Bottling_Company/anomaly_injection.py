@@ -0,0 +1,181 @@
+"""
+Anomaly injection for The Bottling Company use case.
+Writes anomalies into generated time series using slice lookups instead of full-frame masks.
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Optional, Sequence, Tuple, Union
+
+# Supported anomaly shapes
+ANOMALY_SHAPES = ['ramp', 'step', 'stuck', 'noise']
+
+
+class TimeSeriesIndex:
+    """
+    Row ranges of the time series in a frame sorted by id and timestamp.
+    
+    Every id occupies one contiguous block of rows, so the rows of an id within
+    a time range are found with a dictionary lookup and two binary searches.
+    """
+    
+    def __init__(self, df: pd.DataFrame, id_column: str, timestamp_column: str = 'TIMESTAMP'):
+        ids = df[id_column].to_numpy()
+        self.timestamps = df[timestamp_column].to_numpy()
+        
+        block_starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=int)
+        block_ends = np.r_[block_starts[1:], len(ids)]
+        if len(block_starts) != len(pd.unique(ids)):
+            raise ValueError(f"Rows must be sorted by {id_column} and {timestamp_column}")
+        
+        descending = np.flatnonzero(self.timestamps[1:] < self.timestamps[:-1]) + 1
+        if not np.isin(descending, block_starts).all():
+            raise ValueError(f"Rows must be sorted by {id_column} and {timestamp_column}")
+        
+        self._blocks = dict(zip(ids[block_starts], zip(block_starts, block_ends)))
+    
+    def rows(self, series_id: str, start_time: datetime, end_time: datetime) -> Tuple[int, int]:
+        """
+        Get the rows of a time series within a time range.
+        
+        Args:
+            series_id: Id of the time series
+            start_time: First timestamp of the range (inclusive)
+            end_time: Last timestamp of the range (inclusive)
+        
+        Returns:
+            Tuple of (first row, last row + 1); empty if the id is unknown
+        """
+        block = self._blocks.get(series_id)
+        if block is None:
+            return 0, 0
+        block_start, block_end = block
+        timestamps = self.timestamps[block_start:block_end]
+        first = np.searchsorted(timestamps, np.datetime64(start_time), side='left')
+        last = np.searchsorted(timestamps, np.datetime64(end_time), side='right')
+        return block_start + first, block_start + last
+
+
+def anomaly_profile(values: np.ndarray, shape: str, target_value: float, ramp_steps: int,
+                    fill_value: Optional[float], rng: np.random.Generator) -> np.ndarray:
+    """
+    Compute the values of a time series during an anomaly.
+    
+    Shapes:
+        ramp: Moves linearly from the first value to the target within ramp_steps,
+              then continues with fill_value (or the target if fill_value is None)
+        step: Jumps to the target for the whole anomaly
+        stuck: Freezes at the first value, like a stuck sensor
+        noise: Adds noise with a standard deviation of the distance to the target
+    
+    Args:
+        values: Values of the time series during the anomaly
+        shape: One of ANOMALY_SHAPES
+        target_value: Value the anomaly moves towards
+        ramp_steps: Number of values until a ramp reaches the target
+        fill_value: Value after a ramp reached the target
+        rng: Random number generator used for noise
+    
+    Returns:
+        Array with the new values
+    """
+    start_value = values[0]
+    if shape == 'ramp':
+        ramp_steps = max(1, min(ramp_steps, len(values)))
+        new_values = np.full(len(values), target_value if fill_value is None else fill_value, dtype=float)
+        new_values[:ramp_steps] = start_value + np.arange(1, ramp_steps + 1) * (target_value - start_value) / ramp_steps
+        return new_values
+    if shape == 'step':
+        return np.full(len(values), target_value, dtype=float)
+    if shape == 'stuck':
+        return np.full(len(values), start_value, dtype=float)
+    if shape == 'noise':
+        return values + rng.normal(0, abs(target_value - start_value), size=len(values))
+    raise ValueError(f"Unknown anomaly shape '{shape}', expected one of {ANOMALY_SHAPES}")
+
+
+def inject_anomalies(df: pd.DataFrame, id_column: str, value_column: str, anomalies_df: pd.DataFrame,
+                     target: Union[str, float] = 'TARGET_VALUE', fill_value: Optional[float] = np.nan,
+                     index: Optional[TimeSeriesIndex] = None,
+                     rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    """
+    Inject anomalies into a column of a frame sorted by id and timestamp.
+    
+    The value column is copied to a numpy array once, every anomaly writes
+    its rows in place and the column is assigned back at the end. The cost
+    grows with the number of rows inside anomalies instead of the number of
+    anomalies times the number of rows in the frame.
+    
+    Args:
+        df: Time series sorted by id_column and TIMESTAMP
+        id_column: Column identifying the time series (e.g. SENSOR_ID or MACHINE_ID)
+        value_column: Column to modify
+        anomalies_df: Anomalies with id_column, ANOMALY_START, ANOMALY_END and RAMP_STEPS,
+            and optionally SHAPE (default 'ramp') and the target column
+        target: Column of anomalies_df holding the target value, or one target for all anomalies
+        fill_value: Value after a ramp reached the target; None keeps the target
+        index: Index of df to reuse between columns (default: built from df)
+        rng: Random number generator used for noise (default: unseeded)
+    
+    Returns:
+        DataFrame: df with the modified value column
+    """
+    index = index if index is not None else TimeSeriesIndex(df, id_column)
+    rng = rng if rng is not None else np.random.default_rng()
+    
+    values = df[value_column].to_numpy(copy=True)
+    targets = anomalies_df[target].to_numpy() if isinstance(target, str) else np.full(len(anomalies_df), target)
+    shapes = anomalies_df['SHAPE'].to_numpy() if 'SHAPE' in anomalies_df else np.full(len(anomalies_df), 'ramp')
+    
+    anomalies = zip(anomalies_df[id_column], anomalies_df['ANOMALY_START'], anomalies_df['ANOMALY_END'],
+                    anomalies_df['RAMP_STEPS'], shapes, targets)
+    for series_id, anomaly_start, anomaly_end, ramp_steps, shape, target_value in anomalies:
+        first, last = index.rows(series_id, anomaly_start, anomaly_end)
+        if first < last:
+            values[first:last] = anomaly_profile(
+                values[first:last].astype(float), shape, target_value, int(ramp_steps), fill_value, rng
+            )
+    
+    df[value_column] = values
+    return df
+
+
+def sample_anomalies(machine_sensors_df: pd.DataFrame, count: int, start_time: datetime,
+                     duration_minutes: int, rng: np.random.Generator,
+                     shapes: Sequence[str] = ANOMALY_SHAPES) -> pd.DataFrame:
+    """
+    Sample random anomalies on random sensors.
+    
+    Anomalies last between 1 and 10 hours, start after the second day and
+    move towards 150-200% of the sensor maximum or 20-50% of its minimum.
+    
+    Args:
+        machine_sensors_df: Sensors with MACHINE_ID, SENSOR_ID, SENSOR_MIN and SENSOR_MAX
+        count: Number of anomalies
+        start_time: Timestamp of the first generated value
+        duration_minutes: Minutes of generated data
+        rng: Random number generator
+        shapes: Shapes to choose from
+    
+    Returns:
+        DataFrame with the sensor columns plus ANOMALY_START, ANOMALY_END, ANOMALY_DURATION,
+        RAMP_STEPS, SHAPE and TARGET_VALUE
+    """
+    anomalies_df = machine_sensors_df.iloc[rng.integers(len(machine_sensors_df), size=count)].reset_index(drop=True)
+    
+    durations = rng.integers(60, 601, size=count)
+    offsets = rng.integers(min(60*24*2, duration_minutes - 1), duration_minutes, size=count)
+    anomalies_df['ANOMALY_START'] = pd.Timestamp(start_time) + pd.to_timedelta(offsets, unit='m')
+    anomalies_df['ANOMALY_END'] = anomalies_df['ANOMALY_START'] + pd.to_timedelta(durations, unit='m')
+    anomalies_df['ANOMALY_DURATION'] = durations
+    anomalies_df['RAMP_STEPS'] = (rng.integers(25, 51, size=count) / 100 * durations).astype(int)
+    anomalies_df['SHAPE'] = rng.choice(list(shapes), size=count)
+    
+    too_high = rng.integers(0, 2, size=count) == 1
+    anomalies_df['TARGET_VALUE'] = np.where(
+        too_high,
+        anomalies_df['SENSOR_MAX'] * (1 + rng.integers(50, 101, size=count) / 100),
+        anomalies_df['SENSOR_MIN'] * (rng.integers(20, 51, size=count) / 100)
+    )
+    return anomalies_df
\ No newline at end of file
@@ -0,0 +1,522 @@
+"""
+Synthetic data generator for The Bottling Company use case.
+Generates sensor and production time series for all sensors and machines at once with numpy.
+
+Run as a script to generate datasets of any size in bounded memory, for example:
+    
+    python data_generator.py --plants 5 --lines 100 --days 90 --output data/ --workers 8
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# Produced units per machine and minute
+PRODUCTION_VALUE_MIN = 90
+PRODUCTION_VALUE_MAX = 100
+
+
+def load_machine_definitions(path: str = 'machines.json') -> dict:
+    """
+    Load the machine types with their models and sensors.
+    
+    Args:
+        path: Path of the machine definitions file
+    
+    Returns:
+        dict: Machine definitions by machine name
+    """
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def generate_lines(plants: int, num_lines: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generate production lines, each assigned to a random plant.
+    
+    Args:
+        plants: Number of plants
+        num_lines: Number of production lines
+        rng: Random number generator
+    
+    Returns:
+        DataFrame with PLANT_ID, LINE_ID and LINE_NAME
+    """
+    plant_numbers = rng.integers(1, plants + 1, size=num_lines)
+    return pd.DataFrame({
+        'PLANT_ID': [f'P_{plant_number:04d}' for plant_number in plant_numbers],
+        'LINE_ID': [f'L_{i+1:04d}' for i in range(num_lines)],
+        'LINE_NAME': [f'Bottling Line {i+1:04d}' for i in range(num_lines)]
+    })
+
+
+def generate_machines(lines_df: pd.DataFrame, machine_definitions: dict, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generate one machine of every machine type per line with a random model.
+    
+    Args:
+        lines_df: Production lines with LINE_ID
+        machine_definitions: Machine definitions by machine name
+        rng: Random number generator
+    
+    Returns:
+        DataFrame with LINE_ID, MACHINE_ID, MACHINE_NAME, MACHINE_MANUFACTURER and MACHINE_MODEL
+    """
+    machines = []
+    for ix, line_id in enumerate(lines_df['LINE_ID']):
+        for i, machine_name in enumerate(machine_definitions):
+            models = machine_definitions[machine_name]['machines']
+            machine_definition = models[rng.integers(len(models))]
+            machines.append({
+                'LINE_ID': line_id,
+                'MACHINE_ID': f'M_{ix+1:04d}_{i+1:02d}',
+                'MACHINE_NAME': machine_name,
+                'MACHINE_MANUFACTURER': machine_definition['manufacturer'],
+                'MACHINE_MODEL': machine_definition['machine_model']
+            })
+    return pd.DataFrame(machines)
+
+
+def generate_sensors(machines_df: pd.DataFrame, machine_definitions: dict) -> pd.DataFrame:
+    """
+    Generate the sensors of all machines.
+    
+    Args:
+        machines_df: Machines with MACHINE_ID and MACHINE_NAME
+        machine_definitions: Machine definitions by machine name
+    
+    Returns:
+        DataFrame with MACHINE_ID, SENSOR_ID, SENSOR_NAME, SENSOR_METRIC, SENSOR_UNIT, SENSOR_MIN and SENSOR_MAX
+    """
+    machine_sensors = []
+    for machine_id, machine_name in zip(machines_df['MACHINE_ID'], machines_df['MACHINE_NAME']):
+        for i, sensor in enumerate(machine_definitions[machine_name]['sensors']):
+            machine_sensors.append({
+                'MACHINE_ID': machine_id,
+                'SENSOR_ID': f'S_{machine_id[2:]}_{i+1:02d}',
+                'SENSOR_NAME': sensor['sensor_name'],
+                'SENSOR_METRIC': sensor['metric'],
+                'SENSOR_UNIT': sensor['unit'],
+                'SENSOR_MIN': sensor['min'],
+                'SENSOR_MAX': sensor['max']
+            })
+    return pd.DataFrame(machine_sensors)
+
+
+def generate_timestamps(start_time: datetime, periods: int, interval_minutes: int = 1) -> pd.DatetimeIndex:
+    """
+    Generate the timestamps shared by all generated time series.
+    
+    Args:
+        start_time: Timestamp of the first value
+        periods: Number of timestamps
+        interval_minutes: Minutes between two timestamps
+    
+    Returns:
+        DatetimeIndex with one timestamp per period
+    """
+    return pd.date_range(start=start_time, periods=periods, freq=pd.Timedelta(minutes=interval_minutes))
+
+
+def clamped_random_walk(start_values: np.ndarray, steps: np.ndarray,
+                        min_values: np.ndarray, max_values: np.ndarray) -> np.ndarray:
+    """
+    Compute random walks that are clamped to their range after every step.
+    
+    Each step maps a value x to clip(x + step, min, max). Two such maps
+    compose into a map of the same form, so all prefixes of the walk are
+    computed with a parallel prefix scan in log2(periods) vectorized passes
+    instead of one Python iteration per step. The result is identical to
+    clamping after every step.
+    
+    Args:
+        start_values: Value before the first step, one per walk
+        steps: Steps of all walks, shape (walks, periods)
+        min_values: Lower bound, one per walk
+        max_values: Upper bound, one per walk
+    
+    Returns:
+        Array of walk values with the same shape as steps
+    """
+    steps = np.asarray(steps, dtype=float)
+    walks, periods = steps.shape
+    min_values = np.broadcast_to(np.asarray(min_values, dtype=float).reshape(-1, 1), (walks, 1))
+    max_values = np.broadcast_to(np.asarray(max_values, dtype=float).reshape(-1, 1), (walks, 1))
+    
+    # Every prefix of steps is the map x -> clip(x + offset, lower, upper)
+    offsets = np.cumsum(steps, axis=1)
+    lower = np.repeat(min_values, periods, axis=1)
+    upper = np.repeat(max_values, periods, axis=1)
+    
+    distance = 1
+    while distance < periods:
+        # Apply the map of the preceding block first, then the map of the current block
+        shift = offsets[:, distance:] - offsets[:, :-distance]
+        new_lower = np.clip(lower[:, :-distance] + shift, lower[:, distance:], upper[:, distance:])
+        new_upper = np.clip(upper[:, :-distance] + shift, lower[:, distance:], upper[:, distance:])
+        lower[:, distance:] = new_lower
+        upper[:, distance:] = new_upper
+        distance *= 2
+    
+    start_values = np.asarray(start_values, dtype=float).reshape(-1, 1)
+    return np.clip(start_values + offsets, lower, upper)
+
+
+def sensor_walks(min_values: np.ndarray, max_values: np.ndarray, periods: int, rng: np.random.Generator,
+                 start_values: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Generate clamped random walks of sensor values.
+    
+    Every walk starts within 10% of the middle of the sensor range and moves
+    by at most 5% of the range per timestamp.
+    
+    Args:
+        min_values: Minimum value per sensor
+        max_values: Maximum value per sensor
+        periods: Number of timestamps
+        rng: Random number generator
+        start_values: Values before the first step to continue previous walks (default: random)
+    
+    Returns:
+        Array of sensor values, shape (sensors, periods)
+    """
+    if start_values is None:
+        mean_values = (min_values + max_values) / 2
+        start_values = rng.uniform(mean_values * 0.9, mean_values * 1.1)
+    max_steps = (max_values - min_values) * 0.05
+    steps = rng.uniform(-1, 1, size=(len(min_values), periods)) * max_steps[:, None]
+    return clamped_random_walk(start_values, steps, min_values, max_values)
+
+
+def production_walks(machines: int, periods: int, rng: np.random.Generator,
+                     min_value: int = PRODUCTION_VALUE_MIN, max_value: int = PRODUCTION_VALUE_MAX,
+                     start_values: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Generate clamped integer random walks of produced units.
+    
+    Steps are truncated to whole units like the produced units themselves.
+    
+    Args:
+        machines: Number of machines
+        periods: Number of timestamps
+        rng: Random number generator
+        min_value: Minimum number of produced units per timestamp
+        max_value: Maximum number of produced units per timestamp
+        start_values: Values before the first step to continue previous walks (default: random)
+    
+    Returns:
+        Array of produced units, shape (machines, periods)
+    """
+    if start_values is None:
+        mean_value = (min_value + max_value) / 2
+        start_values = np.trunc(rng.uniform(mean_value * 0.9, mean_value * 1.1, size=machines))
+    max_step = (max_value - min_value) * 0.05
+    steps = np.trunc(rng.uniform(-max_step, max_step, size=(machines, periods)))
+    return clamped_random_walk(start_values, steps, min_value, max_value).astype(np.int64)
+
+
+def generate_sensor_values(machine_sensors_df: pd.DataFrame, timestamps: pd.DatetimeIndex,
+                           rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    """
+    Generate sensor values for all sensors using clamped random walks.
+    
+    Args:
+        machine_sensors_df: Sensors with SENSOR_ID, SENSOR_MIN and SENSOR_MAX
+        timestamps: Timestamps shared by all sensors
+        rng: Random number generator (default: unseeded)
+    
+    Returns:
+        DataFrame with SENSOR_ID, VALUE and TIMESTAMP, ordered by sensor and timestamp
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    values = sensor_walks(
+        machine_sensors_df['SENSOR_MIN'].to_numpy(dtype=float),
+        machine_sensors_df['SENSOR_MAX'].to_numpy(dtype=float),
+        len(timestamps),
+        rng
+    )
+    return _to_long_format(machine_sensors_df['SENSOR_ID'], timestamps, {'VALUE': values})
+
+
+def generate_production_values(machines_df: pd.DataFrame, timestamps: pd.DatetimeIndex,
+                               min_value: int = PRODUCTION_VALUE_MIN, max_value: int = PRODUCTION_VALUE_MAX,
+                               rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    """
+    Generate produced and scrapped units for all machines using clamped integer random walks.
+    
+    Args:
+        machines_df: Machines with MACHINE_ID
+        timestamps: Timestamps shared by all machines
+        min_value: Minimum number of produced units per timestamp
+        max_value: Maximum (and expected) number of produced units per timestamp
+        rng: Random number generator (default: unseeded)
+    
+    Returns:
+        DataFrame with MACHINE_ID, UNITS_PRODUCED, UNITS_EXPECTED, UNITS_SCRAPED and TIMESTAMP
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    units_produced = production_walks(len(machines_df), len(timestamps), rng, min_value, max_value)
+    return _production_frame(machines_df['MACHINE_ID'], timestamps, units_produced, max_value)
+
+
+def add_oee_metrics(produced_products_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the OEE performance, quality and availability of every minute.
+    
+    Args:
+        produced_products_df: Production data with UNITS_PRODUCED, UNITS_EXPECTED and UNITS_SCRAPED
+    
+    Returns:
+        DataFrame: The production data with OEE_PERFORMANCE, OEE_QUALITY and OEE_AVAILABILITY
+    """
+    units_produced = produced_products_df['UNITS_PRODUCED']
+    produced_products_df['OEE_PERFORMANCE'] = units_produced / produced_products_df['UNITS_EXPECTED']
+    produced_products_df['OEE_QUALITY'] = units_produced / (units_produced + produced_products_df['UNITS_SCRAPED'])
+    produced_products_df['OEE_AVAILABILITY'] = (units_produced > 0).astype(int)
+    return produced_products_df
+
+
+def generate_line_chunks(machines_df: pd.DataFrame, machine_sensors_df: pd.DataFrame, start_time: datetime,
+                         periods: int, interval_minutes: int, chunk_periods: int,
+                         rng: np.random.Generator) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Generate sensor and production data of some machines in consecutive time chunks.
+    
+    The random walks continue from the last value of the previous chunk, so the
+    chunks together form one continuous time series while only one chunk is
+    held in memory.
+    
+    Args:
+        machines_df: Machines with MACHINE_ID
+        machine_sensors_df: Sensors of these machines with SENSOR_ID, SENSOR_MIN and SENSOR_MAX
+        start_time: Timestamp of the first value
+        periods: Total number of timestamps
+        interval_minutes: Minutes between two timestamps
+        chunk_periods: Maximum number of timestamps per chunk
+        rng: Random number generator
+    
+    Yields:
+        Tuple of (sensor values, production data with OEE metrics) per chunk
+    """
+    min_values = machine_sensors_df['SENSOR_MIN'].to_numpy(dtype=float)
+    max_values = machine_sensors_df['SENSOR_MAX'].to_numpy(dtype=float)
+    sensor_values = None
+    units_produced = None
+    
+    for chunk_start in range(0, periods, chunk_periods):
+        chunk_length = min(chunk_periods, periods - chunk_start)
+        timestamps = generate_timestamps(
+            start_time + timedelta(minutes=chunk_start * interval_minutes), chunk_length, interval_minutes
+        )
+        
+        # Continue the walks from the last values of the previous chunk
+        sensor_values = sensor_walks(min_values, max_values, chunk_length, rng,
+                                     start_values=None if sensor_values is None else sensor_values[:, -1])
+        units_produced = production_walks(len(machines_df), chunk_length, rng,
+                                          start_values=None if units_produced is None else units_produced[:, -1])
+        
+        sensor_values_df = _to_long_format(machine_sensors_df['SENSOR_ID'], timestamps, {'VALUE': sensor_values})
+        produced_products_df = _production_frame(
+            machines_df['MACHINE_ID'], timestamps, units_produced, PRODUCTION_VALUE_MAX
+        )
+        yield sensor_values_df, add_oee_metrics(produced_products_df)
+
+
+def generate_dataset(machine_definitions: dict, plants: int, num_lines: int, start_time: datetime,
+                     periods: int, interval_minutes: int, chunk_periods: int, seed: int,
+                     write_dimension: Callable[[str, pd.DataFrame], None],
+                     write_facts: Callable[[str, pd.DataFrame, pd.DataFrame], int],
+                     workers: int = 1) -> Dict[str, int]:
+    """
+    Generate a complete dataset and pass it to writers chunk by chunk.
+    
+    Every line gets its own random number generator derived from the seed, so
+    the generated data does not depend on the number of workers. With more
+    than one worker, lines are generated in separate processes and
+    write_facts must be picklable.
+    
+    Args:
+        machine_definitions: Machine definitions by machine name
+        plants: Number of plants
+        num_lines: Number of production lines
+        start_time: Timestamp of the first value
+        periods: Number of timestamps per sensor
+        interval_minutes: Minutes between two timestamps
+        chunk_periods: Maximum number of timestamps per chunk
+        seed: Seed of all random number generators
+        write_dimension: Called with (table name, data) for every dimension table
+        write_facts: Called with (line id, machines, sensors) to generate and write the facts of a line
+        workers: Number of processes generating lines in parallel
+    
+    Returns:
+        dict: Number of generated rows per table
+    """
+    rng = np.random.default_rng(seed)
+    lines_df = generate_lines(plants, num_lines, rng)
+    machines_df = generate_machines(lines_df, machine_definitions, rng)
+    machine_sensors_df = generate_sensors(machines_df, machine_definitions)
+    
+    write_dimension('DIM_LINES', lines_df)
+    write_dimension('DIM_MACHINES', machines_df)
+    write_dimension('DIM_SENSORS', machine_sensors_df.drop(['SENSOR_MIN', 'SENSOR_MAX'], axis=1))
+    
+    line_tasks = []
+    for line_number, line_id in enumerate(lines_df['LINE_ID']):
+        line_machines = machines_df[machines_df['LINE_ID'] == line_id]
+        line_sensors = machine_sensors_df[machine_sensors_df['MACHINE_ID'].isin(line_machines['MACHINE_ID'])]
+        line_tasks.append((line_id, line_machines, line_sensors, start_time, periods,
+                           interval_minutes, chunk_periods, [seed, line_number]))
+    
+    row_counts = {'DIM_LINES': len(lines_df), 'DIM_MACHINES': len(machines_df),
+                  'DIM_SENSORS': len(machine_sensors_df), 'FACT_SENSOR_VALUES': 0, 'FACT_OEE': 0}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(write_facts, *zip(*line_tasks)))
+    else:
+        results = [write_facts(*line_task) for line_task in line_tasks]
+    
+    for sensor_rows, production_rows in results:
+        row_counts['FACT_SENSOR_VALUES'] += sensor_rows
+        row_counts['FACT_OEE'] += production_rows
+    return row_counts
+
+
+class ParquetWriter:
+    """Writes tables as Parquet files partitioned by line and chunk."""
+    
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+    
+    def write_dimension(self, table_name: str, df: pd.DataFrame):
+        """Write a dimension table as a single Parquet file."""
+        os.makedirs(os.path.join(self.output_dir, table_name), exist_ok=True)
+        df.to_parquet(os.path.join(self.output_dir, table_name, f'{table_name}.parquet'), index=False)
+    
+    def write_facts(self, line_id: str, machines_df: pd.DataFrame, machine_sensors_df: pd.DataFrame,
+                    start_time: datetime, periods: int, interval_minutes: int, chunk_periods: int,
+                    seed: list) -> Tuple[int, int]:
+        """Generate the facts of a line and write every chunk to its own Parquet file."""
+        rng = np.random.default_rng(seed)
+        row_counts = [0, 0]
+        chunks = generate_line_chunks(machines_df, machine_sensors_df, start_time, periods,
+                                      interval_minutes, chunk_periods, rng)
+        for chunk_number, chunk in enumerate(chunks):
+            for i, (table_name, df) in enumerate(zip(['FACT_SENSOR_VALUES', 'FACT_OEE'], chunk)):
+                partition_dir = os.path.join(self.output_dir, table_name, f'LINE_ID={line_id}')
+                os.makedirs(partition_dir, exist_ok=True)
+                df.to_parquet(os.path.join(partition_dir, f'part-{chunk_number:05d}.parquet'), index=False)
+                row_counts[i] += len(df)
+        return tuple(row_counts)
+
+
+class SnowflakeWriter:
+    """Writes tables to Snowflake with one write_pandas call per chunk."""
+    
+    def __init__(self, session):
+        self.session = session
+        self._created_tables = set()
+    
+    def write_dimension(self, table_name: str, df: pd.DataFrame):
+        """Replace a dimension table."""
+        self._write(table_name, df)
+    
+    def write_facts(self, line_id: str, machines_df: pd.DataFrame, machine_sensors_df: pd.DataFrame,
+                    start_time: datetime, periods: int, interval_minutes: int, chunk_periods: int,
+                    seed: list) -> Tuple[int, int]:
+        """Generate the facts of a line and append every chunk to the fact tables."""
+        rng = np.random.default_rng(seed)
+        row_counts = [0, 0]
+        chunks = generate_line_chunks(machines_df, machine_sensors_df, start_time, periods,
+                                      interval_minutes, chunk_periods, rng)
+        for chunk in chunks:
+            for i, (table_name, df) in enumerate(zip(['FACT_SENSOR_VALUES', 'FACT_OEE'], chunk)):
+                self._write(table_name, df)
+                row_counts[i] += len(df)
+        return tuple(row_counts)
+    
+    def _write(self, table_name: str, df: pd.DataFrame):
+        """Overwrite the table on its first write and append afterwards."""
+        self.session.write_pandas(
+            df=df,
+            table_name=table_name,
+            overwrite=table_name not in self._created_tables,
+            use_logical_type=True,
+            auto_create_table=True
+        )
+        self._created_tables.add(table_name)
+
+
+def _production_frame(machine_ids: pd.Series, timestamps: pd.DatetimeIndex, units_produced: np.ndarray,
+                      units_expected: int) -> pd.DataFrame:
+    """Build production data where scrap grows with the gap between produced and expected units."""
+    return _to_long_format(machine_ids, timestamps, {
+        'UNITS_PRODUCED': units_produced,
+        'UNITS_EXPECTED': np.full_like(units_produced, units_expected),
+        'UNITS_SCRAPED': ((units_expected - units_produced) * 0.25).astype(np.int64)
+    })
+
+
+def _to_long_format(ids: pd.Series, timestamps: pd.DatetimeIndex, columns: dict) -> pd.DataFrame:
+    """Flatten (id, timestamp) matrices into one row per id and timestamp."""
+    periods = len(timestamps)
+    data = {ids.name: np.repeat(ids.to_numpy(), periods)}
+    data.update({name: values.reshape(-1) for name, values in columns.items()})
+    data['TIMESTAMP'] = np.tile(timestamps.to_numpy(), len(ids))
+    return pd.DataFrame(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic data for The Bottling Company.')
+    parser.add_argument('--plants', type=int, default=3, help='number of plants')
+    parser.add_argument('--lines', type=int, default=10, help='number of production lines')
+    parser.add_argument('--days', type=float, default=14, help='days of sensor data, ending now')
+    parser.add_argument('--interval-minutes', type=int, default=1, help='minutes between two sensor values')
+    parser.add_argument('--chunk-days', type=float, default=1, help='days of data generated and written at once per line')
+    parser.add_argument('--seed', type=int, default=42, help='seed of the random number generators')
+    parser.add_argument('--machines', default='machines.json', help='path of the machine definitions')
+    parser.add_argument('--workers', type=int, default=1, help='processes generating lines in parallel (Parquet only)')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output', help='directory to write Parquet files to')
+    target.add_argument('--snowflake', action='store_true',
+                        help='write to the current schema with connection parameters from SNOWFLAKE_* environment variables')
+    args = parser.parse_args()
+    
+    periods = int(args.days * 24 * 60 / args.interval_minutes)
+    chunk_periods = max(1, int(args.chunk_days * 24 * 60 / args.interval_minutes))
+    start_time = datetime.now() - timedelta(minutes=periods * args.interval_minutes)
+    
+    if args.snowflake:
+        from snowflake.snowpark import Session
+        session = Session.builder.configs({
+            name.lower(): os.getenv(f'SNOWFLAKE_{name}')
+            for name in ['ACCOUNT', 'USER', 'PASSWORD', 'ROLE', 'WAREHOUSE', 'DATABASE', 'SCHEMA']
+        }).create()
+        # A Snowpark session can't be shared with other processes
+        writer, workers = SnowflakeWriter(session), 1
+    else:
+        writer, workers = ParquetWriter(args.output), args.workers
+    
+    row_counts = generate_dataset(
+        machine_definitions=load_machine_definitions(args.machines),
+        plants=args.plants,
+        num_lines=args.lines,
+        start_time=start_time,
+        periods=periods,
+        interval_minutes=args.interval_minutes,
+        chunk_periods=chunk_periods,
+        seed=args.seed,
+        write_dimension=writer.write_dimension,
+        write_facts=writer.write_facts,
+        workers=workers
+    )
+    for table_name, rows in row_counts.items():
+        print(f'{table_name}: {rows:,} rows')
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
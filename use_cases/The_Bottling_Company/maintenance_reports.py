@@ -0,0 +1,249 @@
+"""
+Maintenance report generation for The Bottling Company use case.
+Generates reports with bounded concurrency and rate limits, caching every result by its prompt hash.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+# Incident details put in front of the shared report template
+PROMPT_HEADER = """You are a technican that works on a machine incident.
+
+MACHINE_ID: {MACHINE_ID}
+SENSOR_ID: {SENSOR_ID}
+SENSOR_NAME: {SENSOR_NAME}
+SENSOR_METRIC: {SENSOR_METRIC}
+SENSOR_UNIT: {SENSOR_UNIT}
+Sensor Min Value (Normal behavior): {SENSOR_MIN}
+Sensor Max Value (Normal Behavior): {SENSOR_MAX}
+Anomaly Start: {ANOMALY_START}
+Anomaly End: {ANOMALY_END}
+Actual Sensor Value during incident: {TARGET_VALUE}
+
+Generate a realistic looking maintenance report.
+Explain the issue and the steps taken to resolve the issue.
+Resolving the issue could include replacing a part, recalibrating a sensor, etc.
+
+Use this template to create maintenance reports:
+
+"""
+
+
+def load_report_template(path: str = 'maintenance_report_template.md') -> str:
+    """
+    Load the maintenance report template shared by all prompts.
+    
+    Args:
+        path: Path of the template file
+    
+    Returns:
+        str: Report template
+    """
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def build_report_prompts(anomalies_df: pd.DataFrame, template: str) -> List[str]:
+    """
+    Build one report prompt per anomaly.
+    
+    The template is kept once and only joined with the incident details
+    when a prompt is built, so the frame of anomalies stays small.
+    
+    Args:
+        anomalies_df: Anomalies with the columns used in PROMPT_HEADER
+        template: Report template
+    
+    Returns:
+        List of prompts in the order of anomalies_df
+    """
+    return [PROMPT_HEADER.format(**row) + template for row in anomalies_df.to_dict('records')]
+
+
+def prompt_hash(model: str, prompt: str) -> str:
+    """
+    Hash a prompt together with the model that completes it.
+    
+    Args:
+        model: Name of the model
+        prompt: Prompt text
+    
+    Returns:
+        str: SHA-256 hex digest
+    """
+    return hashlib.sha256(f"{model}\n{prompt}".encode('utf-8')).hexdigest()
+
+
+class ReportCache:
+    """
+    In-memory cache of generated reports by prompt hash.
+    
+    Subclasses persist the reports by overriding get_many and put_many.
+    """
+    
+    def __init__(self):
+        self._reports: Dict[str, str] = {}
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the cached reports of prompt hashes.
+        
+        Args:
+            keys: Prompt hashes
+        
+        Returns:
+            Dictionary of the cached reports by prompt hash; missing hashes are left out
+        """
+        return {key: self._reports[key] for key in keys if key in self._reports}
+    
+    def put_many(self, reports: Dict[str, str]):
+        """
+        Cache reports.
+        
+        Args:
+            reports: Reports by prompt hash
+        """
+        self._reports.update(reports)
+
+
+class SnowflakeReportCache(ReportCache):
+    """
+    Report cache stored in a Snowflake table, so reruns of the notebook
+    only generate reports for new or previously failed prompts.
+    """
+    
+    def __init__(self, session, table_name: str = 'MAINTENANCE_REPORT_CACHE'):
+        super().__init__()
+        self.session = session
+        self.table_name = table_name
+        self.session.sql(
+            f"CREATE TABLE IF NOT EXISTS {table_name} "
+            f"(PROMPT_HASH VARCHAR, MAINTENANCE_DOCUMENT VARCHAR, CREATED_AT TIMESTAMP_NTZ)"
+        ).collect()
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        rows = self.session.sql(
+            f"SELECT PROMPT_HASH, MAINTENANCE_DOCUMENT FROM {self.table_name} "
+            f"WHERE PROMPT_HASH IN (SELECT VALUE::VARCHAR FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?))))",
+            params=[json.dumps(keys)]
+        ).collect()
+        return {row['PROMPT_HASH']: row['MAINTENANCE_DOCUMENT'] for row in rows}
+    
+    def put_many(self, reports: Dict[str, str]):
+        if not reports:
+            return
+        self.session.write_pandas(
+            df=pd.DataFrame({
+                'PROMPT_HASH': list(reports.keys()),
+                'MAINTENANCE_DOCUMENT': list(reports.values()),
+                'CREATED_AT': pd.Timestamp.now()
+            }),
+            table_name=self.table_name,
+            overwrite=False,
+            use_logical_type=True
+        )
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly to a maximum rate.
+    """
+    
+    def __init__(self, calls_per_second: float):
+        self.interval = 1 / calls_per_second if calls_per_second > 0 else 0
+        self._lock = threading.Lock()
+        self._next_call = time.monotonic()
+    
+    def acquire(self):
+        """Block until the next call is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ReportGenerator:
+    """
+    Generates maintenance reports with an LLM function.
+    
+    Reports are looked up in the cache first. Missing reports are generated
+    in batches on a bounded thread pool, and every batch is written to the
+    cache before the next one starts, so an interrupted run resumes where it
+    stopped. Failed prompts are retried with exponential backoff and are not
+    cached, so the next run only retries them.
+    
+    The LLM function takes a prompt and returns the report, which makes it
+    easy to replace with a local stub, e.g. ReportGenerator(lambda prompt: 'report').
+    """
+    
+    def __init__(self, llm: Callable[[str], str], model: str = 'claude-4-sonnet',
+                 cache: Optional[ReportCache] = None, max_workers: int = 8,
+                 calls_per_second: float = 4, max_retries: int = 3,
+                 retry_delay_seconds: float = 2, batch_size: int = 100):
+        self.llm = llm
+        self.model = model
+        self.cache = cache if cache is not None else ReportCache()
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(calls_per_second)
+        self.max_retries = max_retries
+        self.retry_delay_seconds = retry_delay_seconds
+        self.batch_size = batch_size
+        self.failed: Dict[str, str] = {}
+    
+    def generate(self, prompts: Sequence[str]) -> List[Optional[str]]:
+        """
+        Generate the reports of prompts.
+        
+        Identical prompts are generated once. Errors of prompts that still
+        failed after all retries are kept in self.failed by prompt hash.
+        
+        Args:
+            prompts: Report prompts
+        
+        Returns:
+            List of reports in the order of prompts; None for failed prompts
+        """
+        keys = [prompt_hash(self.model, prompt) for prompt in prompts]
+        unique_prompts = dict(zip(keys, prompts))
+        
+        reports = self.cache.get_many(unique_prompts.keys())
+        missing = [key for key in unique_prompts if key not in reports]
+        self.failed = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                results = executor.map(lambda key: self._complete(unique_prompts[key]), batch)
+                generated = {}
+                for key, (report, error) in zip(batch, results):
+                    if error is None:
+                        generated[key] = report
+                    else:
+                        self.failed[key] = error
+                self.cache.put_many(generated)
+                reports.update(generated)
+        
+        return [reports.get(key) for key in keys]
+    
+    def _complete(self, prompt: str):
+        """Call the LLM function with retries. Returns (report, None) or (None, error)."""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                time.sleep(self.retry_delay_seconds * 2 ** (attempt - 1))
+            self.rate_limiter.acquire()
+            try:
+                return self.llm(prompt), None
+            except Exception as e:
+                error = str(e)
+        return None, error
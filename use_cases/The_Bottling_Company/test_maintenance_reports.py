@@ -0,0 +1,71 @@
+"""
+Tests for the maintenance report generation of The Bottling Company use case.
+Uses a local stub instead of the LLM, so no Snowflake connection is needed.
+"""
+
+import pandas as pd
+
+from maintenance_reports import ReportCache, ReportGenerator, build_report_prompts, prompt_hash
+
+
+def make_generator(llm, cache=None):
+    return ReportGenerator(llm, model='stub', cache=cache, max_workers=2,
+                           calls_per_second=0, max_retries=1, retry_delay_seconds=0, batch_size=2)
+
+
+def test_build_report_prompts_is_stable():
+    anomalies_df = pd.DataFrame([{
+        'MACHINE_ID': 'M_0007_02', 'SENSOR_ID': 'S_0007_02_01', 'SENSOR_NAME': 'Fill Level Sensor',
+        'SENSOR_METRIC': 'Fill Level', 'SENSOR_UNIT': 'mm', 'SENSOR_MIN': 148.0, 'SENSOR_MAX': 152.0,
+        'ANOMALY_START': pd.Timestamp('2025-09-02 20:13'), 'ANOMALY_END': pd.Timestamp('2025-09-03 00:58'),
+        'TARGET_VALUE': 284.24
+    }])
+    
+    first_prompts = build_report_prompts(anomalies_df, 'TEMPLATE')
+    second_prompts = build_report_prompts(anomalies_df.copy(), 'TEMPLATE')
+    
+    assert first_prompts == second_prompts
+    assert first_prompts[0].endswith('TEMPLATE')
+    assert 'Anomaly Start: 2025-09-02 20:13:00' in first_prompts[0]
+
+
+def test_rerun_uses_cached_reports():
+    calls = []
+    cache = ReportCache()
+    
+    def llm(prompt):
+        calls.append(prompt)
+        return f'report for {prompt}'
+    
+    prompts = ['a', 'b', 'a', 'c']
+    first_reports = make_generator(llm, cache).generate(prompts)
+    second_reports = make_generator(llm, cache).generate(prompts)
+    
+    assert first_reports == ['report for a', 'report for b', 'report for a', 'report for c']
+    assert second_reports == first_reports
+    assert sorted(calls) == ['a', 'b', 'c']
+
+
+def test_rerun_retries_only_failed_prompts():
+    calls = []
+    cache = ReportCache()
+    
+    def failing_llm(prompt):
+        calls.append(prompt)
+        if prompt == 'b':
+            raise RuntimeError('rate limited')
+        return 'report'
+    
+    generator = make_generator(failing_llm, cache)
+    reports = generator.generate(['a', 'b', 'c'])
+    
+    assert reports == ['report', None, 'report']
+    assert generator.failed == {prompt_hash('stub', 'b'): 'rate limited'}
+    assert calls.count('b') == 2
+    
+    calls.clear()
+    generator = make_generator(lambda prompt: calls.append(prompt) or 'report', cache)
+    
+    assert generator.generate(['a', 'b', 'c']) == ['report', 'report', 'report']
+    assert generator.failed == {}
+    assert calls == ['b']